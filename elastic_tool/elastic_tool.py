@@ -1,26 +1,34 @@
 import json
+import os
 import sys
 
 import requests
 
 HEADERS = {'Content-Type': 'application/json'}
+# Cluster state sections whose entries Cluster.state_entries yields one by one, and the maps nested in them
+STATE_NESTED_SECTIONS = ('nodes', 'routing_nodes', 'routing_table', 'metadata')
+STATE_NESTED_KEYS = ('indices', 'nodes')
 
 
 class EsTool:
-    def __init__(self):
-        self.es = self.validate_connection('elasticsearch_url_here')
-        self.cat = self.Cat(self.es)
-        self.cluster = self.Cluster(self.es)
-        self.document = self.Document(self.es)
-        self.indices = self.Indices(self.es)
-        self.snapshot = self.Snapshot(self.es)
-        self.watcher = self.Watcher(self.es)
+    def __init__(self, sessions=None):
+        self.url = os.environ.get('elasticsearch_url', 'elasticsearch_url_here')
+        self.http = sessions.session(self.url) if sessions else requests.Session()
+        self.es = self.validate_connection(self.url)
+        self.cat = self.Cat(self)
+        self.cluster = self.Cluster(self)
+        self.document = self.Document(self)
+        self.indices = self.Indices(self)
+        self.snapshot = self.Snapshot(self)
+        self.watcher = self.Watcher(self)
 
     def __add__(self, other):
         return str(self.es) + other
 
-    @staticmethod
-    def validate_connection(es_instance):
+    def __str__(self):
+        return str(self.es)
+
+    def validate_connection(self, es_instance):
         """Attempts .ping() command on given es instance
 
         :param str es_instance: ElasticSearch instance url to validate connection
@@ -28,7 +36,7 @@ class EsTool:
         :rtype: str
         :raises: ConnectionError
         """
-        es = requests.get(es_instance)
+        es = self.http.get(es_instance)
         if es.ok:
             return es_instance
         raise ConnectionError
@@ -51,7 +59,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/aliases?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/aliases?{verbose}{return_format}&pretty", stream=True).text
                 )
 
         @staticmethod
@@ -68,7 +76,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/allocation?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/allocation?{verbose}{return_format}&pretty", stream=True).text
             )
 
         def anomaly_detectors(self, verbose=False, return_format='text'):
@@ -78,7 +86,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/anomaly_detectors?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/anomaly_detectors?{verbose}{return_format}&pretty", stream=True).text
             )
 
         def count_all(self, verbose=False, return_format='text'):
@@ -88,7 +96,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/count?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/count?{verbose}{return_format}&pretty", stream=True).text
             )
 
         def count(self, index, verbose=False, return_format='text'):
@@ -99,7 +107,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/{index}/_count?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/{index}/_count?{verbose}{return_format}&pretty", stream=True).text
             )
 
         def dataframe_analytics(self, verbose=False, return_format='text'):
@@ -109,7 +117,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/ml/data_frame/analytics?{verbose}{return_format}&pretty",
+                self.es.http.get(f"{self.es}/_cat/ml/data_frame/analytics?{verbose}{return_format}&pretty",
                              stream=True).text
             )
 
@@ -120,7 +128,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/ml/datafeeds?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/ml/datafeeds?{verbose}{return_format}&pretty", stream=True).text
             )
 
         def field_data_all(self, verbose=False, return_format='text'):
@@ -130,7 +138,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/fielddata?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/fielddata?{verbose}{return_format}&pretty", stream=True).text
             )
 
         def field_data(self, field, verbose=False, return_format='text'):
@@ -141,7 +149,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/fielddata/{field}?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/fielddata/{field}?{verbose}{return_format}&pretty", stream=True).text
             )
 
         def health(self, verbose=False, return_format='text'):
@@ -151,7 +159,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/health?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/health?{verbose}{return_format}&pretty", stream=True).text
             )
 
         def indices_all(self, verbose=False, return_format='text'):
@@ -161,7 +169,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/indices?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/indices?{verbose}{return_format}&pretty", stream=True).text
             )
 
         def indices(self, index, verbose=False, return_format='text'):
@@ -172,7 +180,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/indices/{index}?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/indices/{index}?{verbose}{return_format}&pretty", stream=True).text
             )
 
         def master(self, verbose=False, return_format='text'):
@@ -182,7 +190,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/master?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/master?{verbose}{return_format}&pretty", stream=True).text
             )
 
         def nodeattrs(self, verbose=False, return_format='text'):
@@ -192,7 +200,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/nodeattrs?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/nodeattrs?{verbose}{return_format}&pretty", stream=True).text
             )
 
         def nodes(self, verbose=False, return_format='text'):
@@ -202,7 +210,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/nodes?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/nodes?{verbose}{return_format}&pretty", stream=True).text
             )
 
         def pending_tasks(self, verbose=False, return_format='text'):
@@ -212,7 +220,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/pending_tasks?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/pending_tasks?{verbose}{return_format}&pretty", stream=True).text
             )
 
         def plugins(self, verbose=False, return_format='text'):
@@ -222,7 +230,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/plugins?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/plugins?{verbose}{return_format}&pretty", stream=True).text
             )
 
         def recovery(self, verbose=False, return_format='text'):
@@ -232,7 +240,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/recovery?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/recovery?{verbose}{return_format}&pretty", stream=True).text
                 )
 
         def repositories(self, verbose=False, return_format='text'):
@@ -242,7 +250,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/repositories?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/repositories?{verbose}{return_format}&pretty", stream=True).text
                 )
 
         def shards(self, verbose=False, return_format='text'):
@@ -252,7 +260,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/shards?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/shards?{verbose}{return_format}&pretty", stream=True).text
                 )
 
         def snapshots(self, repository, verbose=False, return_format='text'):
@@ -263,7 +271,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/snapshots/{repository}?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/snapshots/{repository}?{verbose}{return_format}&pretty", stream=True).text
                 )
 
         def tasks(self, verbose=False, return_format='text'):
@@ -273,7 +281,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/tasks?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/tasks?{verbose}{return_format}&pretty", stream=True).text
                 )
 
         def templates(self, verbose=False, return_format='text'):
@@ -283,7 +291,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/templates?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/templates?{verbose}{return_format}&pretty", stream=True).text
                 )
 
         def thread_pool(self, verbose=False, return_format='text'):
@@ -293,7 +301,7 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/thread_pool?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/thread_pool?{verbose}{return_format}&pretty", stream=True).text
                 )
 
         def transforms(self, verbose=False, return_format='text'):
@@ -303,13 +311,13 @@ class EsTool:
             """
             return_format, verbose = self.set_request_string(return_format, verbose)
             sys.stdout.write(
-                requests.get(f"{self.es}/_cat/transforms?{verbose}{return_format}&pretty", stream=True).text
+                self.es.http.get(f"{self.es}/_cat/transforms?{verbose}{return_format}&pretty", stream=True).text
                 )
 
     class Cluster:
         def __init__(self, es_instance):
             """
-            :type es_instance: Elasticsearch
+            :type es_instance: EsTool
             """
             self.es = es_instance
             self.nodes = self.Nodes(self.es)
@@ -323,7 +331,7 @@ class EsTool:
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.get(self.es + "/_cluster/allocation/explain").text)
+            return json.loads(self.es.http.get(self.es + "/_cluster/allocation/explain").text)
 
         def health(self):
             """Returns the health status of a cluster.
@@ -331,7 +339,7 @@ class EsTool:
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.get(self.es + "/_cluster/health").text)
+            return json.loads(self.es.http.get(self.es + "/_cluster/health").text)
 
         def pending_tasks(self):
             """Returns cluster-level changes that have not yet been executed.
@@ -339,7 +347,7 @@ class EsTool:
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.get(self.es + "/_cluster/pending_tasks").text)
+            return json.loads(self.es.http.get(self.es + "/_cluster/pending_tasks").text)
 
         def remote_info(self):
             """Returns configured remote cluster information
@@ -347,14 +355,14 @@ class EsTool:
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.get(self.es + "/_cluster/remote_info").text)
+            return json.loads(self.es.http.get(self.es + "/_cluster/remote_info").text)
 
         def settings(self):
             """
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.get(self.es + "/_cluster/settings").text)
+            return json.loads(self.es.http.get(self.es + "/_cluster/settings").text)
 
         def state(self, **kwargs):
             """
@@ -376,8 +384,75 @@ class EsTool:
             if 'metric' in kwargs and kwargs['metric'] in [
                 'nodes', 'routing_table', 'routing_nodes', 'metadata', 'master_node', '_all', 'blocks', 'version'
             ]:
-                return json.loads(requests.get(self.es + "/_cluster/state/" + kwargs['metric']).text)
-            return json.loads(requests.get(self.es + "/_cluster/state").text)
+                return json.loads(self.es.http.get(self.es + "/_cluster/state/" + kwargs['metric']).text)
+            return json.loads(self.es.http.get(self.es + "/_cluster/state").text)
+
+        def state_entries(self, metric='_all'):
+            """Streams the cluster state as {section, key, value} records, in the order Elasticsearch sends them
+
+            Top level values are one record with key None. The entries of the nodes, routing_nodes, routing_table and
+            metadata sections, and of the indices and nodes maps inside them, are one record each, eg.
+            {section: 'metadata.indices', key: 'my_index', value: {...}}.
+            With ijson installed the response is parsed as it arrives and only one entry is held at a time,
+            otherwise the whole state is parsed first.
+            """
+            url = self.es + "/_cluster/state" + ("" if metric == '_all' else "/" + metric)
+            with self.es.http.get(url, stream=True) as response:
+                response.raise_for_status()
+                try:
+                    import ijson
+                except ImportError:
+                    yield from self._state_records(json.loads(response.text), [])
+                    return
+                response.raw.decode_content = True
+                events = ijson.parse(response.raw, use_float=True)
+                yield from self._stream_state_records(events, ijson.ObjectBuilder)
+
+        @staticmethod
+        def _descends(path):
+            """Whether the map at key path is split into records rather than being one itself"""
+            if len(path) < 2:
+                return not path or path[0] in STATE_NESTED_SECTIONS
+            return len(path) == 2 and path[0] in STATE_NESTED_SECTIONS and path[1] in STATE_NESTED_KEYS
+
+        @staticmethod
+        def _state_record(path, value):
+            if len(path) == 1:
+                return {"section": path[0], "key": None, "value": value}
+            return {"section": ".".join(path[:-1]), "key": path[-1], "value": value}
+
+        def _state_records(self, value, path):
+            for key, entry in value.items():
+                if isinstance(entry, dict) and self._descends(path + [key]):
+                    yield from self._state_records(entry, path + [key])
+                else:
+                    yield self._state_record(path + [key], entry)
+
+        def _stream_state_records(self, events, object_builder):
+            # Keys of the maps being split into records, the last one is the key of the value the next event starts
+            path = []
+            builder, nesting = None, 0
+            for _, event, value in events:
+                if builder is not None:
+                    builder.event(event, value)
+                    nesting += event in ('start_map', 'start_array')
+                    nesting -= event in ('end_map', 'end_array')
+                    if not nesting:
+                        yield self._state_record(path, builder.value)
+                        builder = None
+                elif event == 'map_key':
+                    path[-1] = value
+                elif event == 'end_map':
+                    path.pop()
+                elif event == 'start_map' and self._descends(path):
+                    path.append(None)
+                else:
+                    builder = object_builder()
+                    builder.event(event, value)
+                    nesting = int(event in ('start_map', 'start_array'))
+                    if not nesting:
+                        yield self._state_record(path, builder.value)
+                        builder = None
 
         def stats(self):
             """The Cluster Stats API allows retrieving statistics from a cluster wide perspective.
@@ -388,26 +463,26 @@ class EsTool:
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.get(self.es + "/_cluster/stats").text)
+            return json.loads(self.es.http.get(self.es + "/_cluster/stats").text)
 
         def info(self):
             """
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.get(self.es + "/_xpack").text)
+            return json.loads(self.es.http.get(self.es + "/_xpack").text)
 
         def usage(self):
             """
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.get(self.es + "/_xpack/usage").text)
+            return json.loads(self.es.http.get(self.es + "/_xpack/usage").text)
 
         class Nodes:
             def __init__(self, es_instance):
                 """
-                :type es_instance: Elasticsearch
+                :type es_instance: EsTool
                 """
                 self.es = es_instance
                 self.shutdown = self.Shutdown(es_instance)
@@ -418,7 +493,7 @@ class EsTool:
                 :return: API response data
                 :rtype: dict
                 """
-                return json.loads(requests.get(self.es + "/_nodes/usage").text)
+                return json.loads(self.es.http.get(self.es + "/_nodes/usage").text)
 
             def hot_threads(self):
                 """Returns the hot threads on each selected node in the cluster.
@@ -426,7 +501,7 @@ class EsTool:
                 :return: API response data
                 :rtype: dict
                 """
-                return json.loads(requests.get(self.es + "/_nodes/hot_threads").text)
+                return json.loads(self.es.http.get(self.es + "/_nodes/hot_threads").text)
 
             def info(self):
                 """Returns information about nodes in the cluster.
@@ -434,7 +509,7 @@ class EsTool:
                 :return: API response data
                 :rtype: dict
                 """
-                return json.loads(requests.get(self.es + "/_nodes/").text)
+                return json.loads(self.es.http.get(self.es + "/_nodes/").text)
 
             def stats(self):
                 """Returns statistics about nodes in the cluster.
@@ -442,7 +517,7 @@ class EsTool:
                 :return: API response data
                 :rtype: dict
                 """
-                return json.loads(requests.get(self.es + "/_nodes/stats").text)
+                return json.loads(self.es.http.get(self.es + "/_nodes/stats").text)
 
             def desired(self):
                 """Returns desired nodes info.
@@ -450,12 +525,12 @@ class EsTool:
                 :return: API response data
                 :rtype: dict
                 """
-                return json.loads(requests.get(self.es + "/_nodes/desired_nodes/_latest").text)
+                return json.loads(self.es.http.get(self.es + "/_nodes/desired_nodes/_latest").text)
 
             class Shutdown:
                 def __init__(self, es_instance):
                     """
-                    :type es_instance: Elasticsearch
+                    :type es_instance: EsTool
                     """
                     self.es = es_instance
 
@@ -466,7 +541,7 @@ class EsTool:
                     :return: API response data
                     :rtype: dict
                     """
-                    return json.loads(requests.get(
+                    return json.loads(self.es.http.get(
                         self.es + f"/_nodes/{kwargs['node_id']}/shutdown",
                         headers=HEADERS,
                         data=kwargs['data']
@@ -479,7 +554,7 @@ class EsTool:
                     :return: API response data
                     :rtype: dict
                     """
-                    return json.loads(requests.get(
+                    return json.loads(self.es.http.get(
                         self.es + f"/_nodes/{kwargs['node_id']}/shutdown",
                         headers=HEADERS,
                         ).text)
@@ -490,7 +565,7 @@ class EsTool:
                     :return: API response data
                     :rtype: dict
                     """
-                    return json.loads(requests.get(self.es + "/_nodes/shutdown").text)
+                    return json.loads(self.es.http.get(self.es + "/_nodes/shutdown").text)
 
                 def status(self, **kwargs):
                     """Returns the status of a shutdown process on the node.
@@ -499,25 +574,25 @@ class EsTool:
                     :return: API response data
                     :rtype: dict
                     """
-                    return json.loads(requests.get(
+                    return json.loads(self.es.http.get(
                         self.es + f"/_nodes/{kwargs['node_id']}/shutdown",
                         ).text)
 
         class Task:
             def __init__(self, es_instance):
                 """
-                :type es_instance: Elasticsearch
+                :type es_instance: EsTool
                 """
                 self.es = es_instance
 
             def list(self):
                 """Returns information about the tasks currently executing in the cluster."""
-                return json.loads(requests.get(self.es + "/_tasks").text)
+                return json.loads(self.es.http.get(self.es + "/_tasks").text)
 
     class Document:
         def __init__(self, es_instance):
             """
-            :type es_instance: Elasticsearch
+            :type es_instance: EsTool
             """
             self.es = es_instance
 
@@ -527,26 +602,26 @@ class EsTool:
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.post(self.es + "/" + kwargs['index'] + "/" + kwargs['type'] + "/",
+            return json.loads(self.es.http.post(self.es + "/" + kwargs['index'] + "/" + kwargs['type'] + "/",
                                             headers=HEADERS,
                                             data=json.dumps(kwargs['data'])).text)
 
         def get(self, index, doc_type, doc_id):
             """Returns a document.
             """
-            return json.loads(requests.get(self.es + "/" + index + "/" + doc_type + "/" + doc_id).text)
+            return json.loads(self.es.http.get(self.es + "/" + index + "/" + doc_type + "/" + doc_id).text)
 
         def multi_get(self, index, doc_type, ids: list):
             """Returns multiple documents.
             """
-            return json.loads(requests.get(self.es + "/" + index + "/" + doc_type + "/_mget",
+            return json.loads(self.es.http.get(self.es + "/" + index + "/" + doc_type + "/_mget",
                                            headers=HEADERS,
                                            data=json.dumps({"ids": ids})).text)
 
         def update(self, **kwargs):
             """Updates a document.
             https://www.elastic.co/guide/en/elasticsearch/reference/current/docs-update.html"""
-            return json.loads(requests.post(self.es + "/" + kwargs['index'] + "/" + kwargs['type'] + "/" + kwargs['id'],
+            return json.loads(self.es.http.post(self.es + "/" + kwargs['index'] + "/" + kwargs['type'] + "/" + kwargs['id'],
                                             headers=HEADERS,
                                             data=json.dumps(kwargs['data'])).text)
 
@@ -555,7 +630,7 @@ class EsTool:
             ! Bulked data has a very specific structure, that needs to be adhered to.
             See the Elasticsearch docs for more information.
             https://www.elastic.co/guide/en/elasticsearch/reference/current/docs-bulk.html"""
-            return json.loads(requests.post(self.es + "/_bulk",
+            return json.loads(self.es.http.post(self.es + "/_bulk",
                                             headers=HEADERS,
                                             data=json.dumps(kwargs['data'])).text)
 
@@ -570,14 +645,14 @@ class EsTool:
                 "index": "my-new-index-000001"
               }
             }"""
-            return json.loads(requests.post(self.es + "/_reindex",
+            return json.loads(self.es.http.post(self.es + "/_reindex",
                                             headers=HEADERS,
                                             data=json.dumps(kwargs['data'])).text)
 
     class Indices:
         def __init__(self, es_instance):
             """
-            :type es_instance: Elasticsearch
+            :type es_instance: EsTool
             """
             self.es = es_instance
             self.alias = self.Alias(self.es)
@@ -590,7 +665,7 @@ class EsTool:
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.get(self.es + "/" + kwargs['index']).text)
+            return json.loads(self.es.http.get(self.es + "/" + kwargs['index']).text)
 
         def create(self, data=None, **kwargs):
             """Creates a new index.
@@ -599,8 +674,8 @@ class EsTool:
             :rtype: dict
             """
             if data is None:
-                return json.loads(requests.put(self.es + "/" + kwargs['index']).text)
-            return json.loads(requests.put(self.es + "/" + kwargs['index'], data=data).text)
+                return json.loads(self.es.http.put(self.es + "/" + kwargs['index']).text)
+            return json.loads(self.es.http.put(self.es + "/" + kwargs['index'], data=data).text)
 
         def delete(self, **kwargs):
             """Deletes an index.
@@ -608,7 +683,7 @@ class EsTool:
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.delete(self.es + "/" + kwargs['index']).text)
+            return json.loads(self.es.http.delete(self.es + "/" + kwargs['index']).text)
 
         def exists(self, **kwargs):
             """Returns information about whether a particular index exists.
@@ -616,7 +691,7 @@ class EsTool:
             :return: API response data
             :rtype: bool
             """
-            return requests.head(self.es + "/" + kwargs['index']).status_code == 200
+            return self.es.http.head(self.es + "/" + kwargs['index']).status_code == 200
 
         def stats(self, **kwargs):
             """Returns statistics about one or more indices.
@@ -624,7 +699,7 @@ class EsTool:
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.get(self.es + "/" + kwargs['index'] + "/_stats").text)
+            return json.loads(self.es.http.get(self.es + "/" + kwargs['index'] + "/_stats").text)
 
         def segments(self, **kwargs):
             """Returns information about the segments in the index.
@@ -632,7 +707,7 @@ class EsTool:
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.get(self.es + "/" + kwargs['index'] + "/_segments").text)
+            return json.loads(self.es.http.get(self.es + "/" + kwargs['index'] + "/_segments").text)
 
         def recovery(self, **kwargs):
             """Returns information about the recovery status of the index.
@@ -640,7 +715,7 @@ class EsTool:
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.get(self.es + "/" + kwargs['index'] + "/_recovery").text)
+            return json.loads(self.es.http.get(self.es + "/" + kwargs['index'] + "/_recovery").text)
 
         def clone(self, **kwargs):
             """Clones an index.
@@ -648,7 +723,7 @@ class EsTool:
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.put(self.es + "/" + kwargs['index'] + "/_clone" + kwargs['clone_index']).text)
+            return json.loads(self.es.http.put(self.es + "/" + kwargs['index'] + "/_clone" + kwargs['clone_index']).text)
 
         def close(self, **kwargs):
             """Closes an index.
@@ -656,12 +731,12 @@ class EsTool:
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.post(self.es + "/" + kwargs['index'] + "/_close").text)
+            return json.loads(self.es.http.post(self.es + "/" + kwargs['index'] + "/_close").text)
 
         class Alias:
             def __init__(self, es_instance):
                 """
-                :type es_instance: Elasticsearch
+                :type es_instance: EsTool
                 """
                 self.es = es_instance
 
@@ -671,7 +746,7 @@ class EsTool:
                 :return: API response data
                 :rtype: dict
                 """
-                return requests.head(self.es + "/" + kwargs['alias']).status_code == 200
+                return self.es.http.head(self.es + "/" + kwargs['alias']).status_code == 200
 
             def get(self, **kwargs):
                 """Retrieves information for one or more aliases.
@@ -679,7 +754,7 @@ class EsTool:
                 :return: API response data
                 :rtype: dict
                 """
-                return json.loads(requests.get(self.es + "/_alias/" + kwargs['alias']).text)
+                return json.loads(self.es.http.get(self.es + "/_alias/" + kwargs['alias']).text)
 
             def create(self, **kwargs):
                 """Creates a new alias for an index
@@ -687,7 +762,7 @@ class EsTool:
                 :return: API response data
                 :rtype: dict
                 """
-                return json.loads(requests.put(self.es + kwargs['index'] + "/_alias/" + kwargs['alias']).text)
+                return json.loads(self.es.http.put(self.es + kwargs['index'] + "/_alias/" + kwargs['alias']).text)
 
             def delete(self, **kwargs):
                 """Deletes an alias.
@@ -695,12 +770,12 @@ class EsTool:
                 :return: API response data
                 :rtype: dict
                 """
-                return json.loads(requests.delete(self.es + kwargs['index'] + "/_alias/" + kwargs['alias']).text)
+                return json.loads(self.es.http.delete(self.es + kwargs['index'] + "/_alias/" + kwargs['alias']).text)
 
         class Cache:
             def __init__(self, es_instance):
                 """
-                :type es_instance: Elasticsearch
+                :type es_instance: EsTool
                 """
                 self.es = es_instance
 
@@ -710,12 +785,12 @@ class EsTool:
                 :return: API response data
                 :rtype: dict
                 """
-                return json.loads(requests.post(self.es + "/" + kwargs['index'] + "/_cache/clear").text)
+                return json.loads(self.es.http.post(self.es + "/" + kwargs['index'] + "/_cache/clear").text)
 
         class Dangling:
             def __init__(self, es_instance):
                 """
-                :type es_instance: Elasticsearch
+                :type es_instance: EsTool
                 """
                 self.es = es_instance
 
@@ -725,7 +800,7 @@ class EsTool:
                 :return: API response data
                 :rtype: dict
                 """
-                return json.loads(requests.get(self.es + "/_dangling").text)
+                return json.loads(self.es.http.get(self.es + "/_dangling").text)
 
             def delete(self, **kwargs):
                 """Deletes dangling indices.
@@ -734,12 +809,12 @@ class EsTool:
                 :rtype: dict
                 """
                 return json.loads(
-                    requests.delete(self.es + "/_dangling" + kwargs['index_uuid'] + "?accept_data_loss=true").text)
+                    self.es.http.delete(self.es + "/_dangling" + kwargs['index_uuid'] + "?accept_data_loss=true").text)
 
     class Snapshot:
         def __init__(self, es_instance):
             """
-            :type es_instance: Elasticsearch
+            :type es_instance: EsTool
             """
             self.es = es_instance
             self.repository = self.Repository(self.es)
@@ -751,7 +826,7 @@ class EsTool:
             :rtype: dict
             """
             return json.loads(
-                requests.put(f"{self.es}/_snapshot/{kwargs['repository_name']}/{kwargs['snapshot_name']}").text)
+                self.es.http.put(f"{self.es}/_snapshot/{kwargs['repository_name']}/{kwargs['snapshot_name']}").text)
 
         def restore(self, **kwargs):
             """Restores a snapshot.
@@ -759,7 +834,7 @@ class EsTool:
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.post(
+            return json.loads(self.es.http.post(
                 f"{self.es}/_snapshot/{kwargs['repository_name']}/{kwargs['snapshot_name']}/_restore").text)
 
         def delete(self, **kwargs):
@@ -769,7 +844,7 @@ class EsTool:
             :rtype: dict
             """
             return json.loads(
-                requests.delete(f"{self.es}/_snapshot/{kwargs['repository_name']}/{kwargs['snapshot_name']}").text)
+                self.es.http.delete(f"{self.es}/_snapshot/{kwargs['repository_name']}/{kwargs['snapshot_name']}").text)
 
         def status(self):
             """Retrieves the status of a snapshot.
@@ -777,12 +852,12 @@ class EsTool:
             :return: API response data
             :rtype: dict
             """
-            return json.loads(requests.get(f"{self.es}/_snapshot/_status").text)
+            return json.loads(self.es.http.get(f"{self.es}/_snapshot/_status").text)
 
         class Repository:
             def __init__(self, es_instance):
                 """
-                :type es_instance: Elasticsearch
+                :type es_instance: EsTool
                 """
                 self.es = es_instance
 
@@ -793,7 +868,7 @@ class EsTool:
                 :rtype: dict
                 """
                 return json.loads(
-                    requests.post(self.es + "/_snapshot/" + kwargs['repository_name'], json=kwargs['data'],
+                    self.es.http.post(self.es + "/_snapshot/" + kwargs['repository_name'], json=kwargs['data'],
                                   headers=HEADERS).text)
 
             def get(self, **kwargs):
@@ -802,7 +877,7 @@ class EsTool:
                 :return: API response data
                 :rtype: dict
                 """
-                return json.loads(requests.get(self.es + "/_snapshot/" + kwargs['repository_name']).text)
+                return json.loads(self.es.http.get(self.es + "/_snapshot/" + kwargs['repository_name']).text)
 
             def delete(self, **kwargs):
                 """Deletes a repository.
@@ -810,7 +885,7 @@ class EsTool:
                 :return: API response data
                 :rtype: dict
                 """
-                return json.loads(requests.delete(self.es + "/_snapshot/" + kwargs['repository_name']).text)
+                return json.loads(self.es.http.delete(self.es + "/_snapshot/" + kwargs['repository_name']).text)
 
             def verify(self, **kwargs):
                 """Verifies a repository.
@@ -818,7 +893,7 @@ class EsTool:
                 :return: API response data
                 :rtype: dict
                 """
-                return json.loads(requests.post(self.es + "/_snapshot/" + kwargs['repository_name'] + "/_verify").text)
+                return json.loads(self.es.http.post(self.es + "/_snapshot/" + kwargs['repository_name'] + "/_verify").text)
 
             def cleanup(self, **kwargs):
                 """Removes unused snapshots.
@@ -827,7 +902,7 @@ class EsTool:
                 :rtype: dict
                 """
                 return json.loads(
-                    requests.delete(self.es + "/_snapshot/" + kwargs['repository_name'] + "/_cleanup").text)
+                    self.es.http.delete(self.es + "/_snapshot/" + kwargs['repository_name'] + "/_cleanup").text)
 
             def analysis(self, **kwargs):
                 """Returns the analysis of the specified index.
@@ -835,12 +910,12 @@ class EsTool:
                 :return: API response data
                 :rtype: dict
                 """
-                return json.loads(requests.post(f"{self.es}/_snapshot/{kwargs['repository_name']}/_analyze").text)
+                return json.loads(self.es.http.post(f"{self.es}/_snapshot/{kwargs['repository_name']}/_analyze").text)
 
     class Watcher:
         def __init__(self, es_instance):
             """
-            :type es_instance: Elasticsearch
+            :type es_instance: EsTool
             """
             self.es = es_instance
 
@@ -851,8 +926,8 @@ class EsTool:
             :rtype: dict
             """
             if metric in ['_all', 'current_watches', 'queued_watches']:
-                return json.loads(requests.get(self.es + f"/_watcher/stats/{metric}").text)
-            return json.loads(requests.get(self.es + f"/_watcher/stats").text)
+                return json.loads(self.es.http.get(self.es + f"/_watcher/stats/{metric}").text)
+            return json.loads(self.es.http.get(self.es + f"/_watcher/stats").text)
 
 
 # sean = EsTool('http://rest-acc3-susi-elasticsearch.ocpcmas.dcp.fi.eu.xdn.ericsson.se')
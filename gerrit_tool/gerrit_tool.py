@@ -24,8 +24,9 @@ class GerritTool:
         remove a reviewer from a change:
             my_gerrit.change.reviewer.delete('<change_id>', '<reviewer_email|id|name>')
     """
-    def __init__(self):
-        self._url = 'gerrit_url_here'
+    def __init__(self, sessions=None):
+        self._url = os.environ.get('gerrit_url', 'gerrit_url_here')
+        self.http = sessions.session(self._url) if sessions else requests.Session()
         self.username = os.environ['gerrit_script_user']
         self.password = os.environ['gerrit_script_token']
         self.auth = (self.username, self.password)
@@ -39,7 +40,7 @@ class GerritTool:
     def get_and_clean(self, endpoint):
         print("GET request to: " + self._url + endpoint)
         try:
-            return json.loads(requests.get(self._url + endpoint, auth=self.auth).text[5:])
+            return json.loads(self.http.get(self._url + endpoint, auth=self.auth).text[5:])
         except Exception as e:
             print("Error with returned JSON:")
             print(f"Exception text: " + str(e))
@@ -50,19 +51,19 @@ class GerritTool:
         if data is None:
             data = {}
         try:
-            return requests.post(self._url + endpoint, auth=self.auth, data=data, headers=HEADERS)
+            return self.http.post(self._url + endpoint, auth=self.auth, data=data, headers=HEADERS)
         except Exception as e:
             print("Error with POSTING JSON: " + str(e))
 
     def put(self, endpoint, data):
         try:
-            return requests.put(self._url + endpoint, auth=self.auth, data=data, headers=HEADERS)
+            return self.http.put(self._url + endpoint, auth=self.auth, data=data, headers=HEADERS)
         except Exception as e:
             print("Error with PUTTING JSON: " + str(e))
 
     def delete(self, endpoint):
         try:
-            return requests.delete(self._url + endpoint, auth=self.auth)
+            return self.http.delete(self._url + endpoint, auth=self.auth)
         except Exception as e:
             print("Error with DELETING JSON: " + str(e))
 
@@ -171,10 +172,17 @@ class GerritTool:
     class Account:
         def __init__(self, gerrit_instance):
             self.gerrit = gerrit_instance
-
-        def get(self, user, detailed=False):
-            details = '/' if not detailed else '/detail'
-            return self.gerrit.get_and_clean(f'/a/accounts/{user}{details}')
+            self._resolved = {}
+
+        def get(self, user, detailed=False, refresh=False):
+            """Resolved accounts are remembered for the life of the GerritTool unless refresh is set"""
+            if (user, detailed) not in self._resolved or refresh:
+                details = '/' if not detailed else '/detail'
+                account = self.gerrit.get_and_clean(f'/a/accounts/{user}{details}')
+                if account is None:
+                    return None
+                self._resolved[(user, detailed)] = account
+            return self._resolved[(user, detailed)]
 
         def groups(self, user):
             return self.gerrit.get_and_clean(f'/a/accounts/{user}/groups')
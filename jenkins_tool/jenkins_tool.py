@@ -1,33 +1,440 @@
+import codecs
+import copy
+import fcntl
+import fnmatch
+import gzip
+import hashlib
+import json
 import os
-from jenkins import Jenkins as J_LIB
+import queue
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, wait
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import quote
+
 import requests
+from jenkins import Jenkins as J_LIB
+
+ROBOT_VISITORS = ('AllTestResults', 'FailedTests', 'PassedTests', 'TestBodies')
+# Seconds a fetched job info is reused by Jobs before it is requested again
+JOB_INFO_TTL = float(os.environ.get('jenkins_job_info_ttl', 30))
+# Requests map_jobs may have in flight against one Jenkins master, across all callers in the process
+MASTER_CONCURRENCY = int(os.environ.get('jenkins_master_concurrency', 8))
+# Timestamps of Robot Framework < 7 output.xml files
+ROBOT_TIME_FORMAT = "%Y%m%d %H:%M:%S.%f"
+# Robot statuses counted by the suite records of robot_records()
+ROBOT_STATUS_COUNTS = {'PASS': 'passed', 'FAIL': 'failed', 'SKIP': 'skipped', 'NOT RUN': 'skipped'}
+# Seconds between the first polls of wait_for_builds, doubled on every poll up to the max
+WAIT_POLL_INITIAL = float(os.environ.get('jenkins_wait_poll_initial', 2))
+WAIT_POLL_MAX = float(os.environ.get('jenkins_wait_poll_max', 60))
+
+# Bytes read per chunk when streaming artifacts to disk
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Local console cache, finished consoles are kept gzipped and evicted least recently used past the size limit
+CONSOLE_CACHE_DIR = Path(os.environ.get('jenkins_console_cache_dir',
+                                        Path.home() / ".cache" / "dev_tools" / "consoles"))
+CONSOLE_CACHE_MAX_BYTES = int(os.environ.get('jenkins_console_cache_max_bytes', 512 * 1024 * 1024))
+# A test is reported slower by Robot.diff when it takes this much longer, relative and in seconds
+ROBOT_DIFF_SLOWER_RATIO = 0.5
+ROBOT_DIFF_SLOWER_SECONDS = 5.0
+# <kw> types timed by Robot.profile_keywords, leaving out the FOR, ITERATION, IF... control structures older
+# Robot versions also write as <kw>
+ROBOT_PROFILED_KW_TYPES = ('KEYWORD', 'SETUP', 'TEARDOWN')
+# Local SQLite index of parsed Robot results, see Builds.Robot.ResultIndex
+ROBOT_INDEX_PATH = Path(os.environ.get('jenkins_robot_index',
+                                       Path.home() / ".cache" / "dev_tools" / "robot_results.sqlite3"))
+
+_master_limits = {}
+_master_limits_lock = threading.Lock()
+# The master limit of the map_jobs worker running on this thread, and whether it holds a permit of it
+_worker = threading.local()
+
+
+def master_limit(server):
+    """The process wide semaphore bounding concurrent map_jobs requests on one Jenkins master"""
+    with _master_limits_lock:
+        if server.server not in _master_limits:
+            _master_limits[server.server] = threading.BoundedSemaphore(MASTER_CONCURRENCY)
+        return _master_limits[server.server]
+
+
+@contextmanager
+def http_permit():
+    """Holds a permit of the master limit for one HTTP request made by a map_jobs worker
+
+    Only the request itself is limited, never a whole operation, so an operation running map_jobs again can not
+    starve its own inner workers of permits. Outside map_jobs workers, and for requests made while a permit is
+    already held, eg. the crumb fetched by python-jenkins, this does nothing.
+    """
+    limit = getattr(_worker, 'limit', None)
+    if limit is None or getattr(_worker, 'holding', False):
+        yield
+        return
+    with limit:
+        _worker.holding = True
+        try:
+            yield
+        finally:
+            _worker.holding = False
+
+
+class LimitedJenkins(J_LIB):
+    """python-jenkins server whose requests from map_jobs workers are bounded by the master limit"""
+
+    def _request(self, req, stream=None):
+        with http_permit():
+            return super()._request(req, stream)
+
+
+def job_url(server, job_name, path='', number=None):
+    """Url of a job, or of one of its builds, folders included
+
+    eg. job_url(server, 'team/my_job', 'api/json', 42) -> http://jenkins/job/team/job/my_job/42/api/json
+    """
+    folder_url, short_name = server._get_job_folder(job_name)
+    return server._build_url(
+        '%(folder_url)sjob/%(short_name)s/%(number)s%(path)s',
+        {'folder_url': folder_url, 'short_name': short_name, 'number': '' if number is None else f"{number}/",
+         'path': path},
+    )
+
+
+def map_jobs(server, names, operation, max_workers=MASTER_CONCURRENCY, timeout=None):
+    """Runs operation for every entry of names concurrently, bounded by the master's concurrency limit
+
+    Workers are daemon threads: operations still running at the timeout are reported and left behind without
+    holding up the interpreter's exit, operations not started by then are cancelled.
+    :param server: python-jenkins server the operations talk to
+    :param list names: job names, or tuples of arguments, eg. (job_name, build_number)
+    :param callable operation: called as operation(name) or operation(*name) for tuples
+    :param int max_workers: threads used for this call
+    :param float timeout: seconds for the whole batch, operations not finished by then report a TimeoutError
+    :return: [ {name, result, error} ] in the order of names, error is None on success
+    :rtype: list(dict)
+    """
+    limit = master_limit(server)
+    futures = [Future() for _ in names]
+    pending = queue.SimpleQueue()
+    for entry in zip(names, futures):
+        pending.put(entry)
+
+    def worker():
+        _worker.limit = limit
+        while True:
+            try:
+                name, future = pending.get_nowait()
+            except queue.Empty:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(operation(*name) if isinstance(name, tuple) else operation(name))
+            except BaseException as error:
+                future.set_exception(error)
+
+    for index in range(max(1, min(max_workers, len(names)))):
+        threading.Thread(target=worker, name=f"map-jobs_{index}", daemon=True).start()
+    wait(futures, timeout=timeout)
+    for future in futures:
+        # Only cancels the operations not started yet
+        future.cancel()
+    results = []
+    for name, future in zip(names, futures):
+        if not future.done():
+            results.append({"name": name, "result": None, "error": f"TimeoutError: not finished in {timeout}s"})
+        elif future.cancelled():
+            results.append({"name": name, "result": None, "error": "CancelledError: timed out before starting"})
+        elif future.exception():
+            error = future.exception()
+            results.append({"name": name, "result": None, "error": f"{type(error).__name__}: {error}"})
+        else:
+            results.append({"name": name, "result": future.result(), "error": None})
+    return results
+
+
+def history_stats(history):
+    """Trend statistics over a columnar build history, as returned by Jobs.build_history
+
+    Builds still running, with no result yet, are left out.
+    :return: {builds, pass_rate, duration_p50, duration_p90, duration_max, pass_rate_trend, duration_trend}
+             pass_rate_trend is the pass rate of the newer half of the window minus that of the older half,
+             duration_trend the least squares slope of the duration in ms per build, None without enough builds
+    :rtype: dict
+    """
+    finished = [(number, result, duration) for number, result, duration
+                in zip(history['number'], history['result'], history['duration']) if result is not None]
+    finished.sort()
+    stats = {"builds": len(finished), "pass_rate": None, "duration_p50": None, "duration_p90": None,
+             "duration_max": None, "pass_rate_trend": None, "duration_trend": None}
+    if not finished:
+        return stats
+    numbers = [number for number, _, _ in finished]
+    passed = [result == 'SUCCESS' for _, result, _ in finished]
+    durations = [duration for _, _, duration in finished]
+    ranked = sorted(durations)
+
+    def percentile(p):
+        return ranked[max(0, -(-len(ranked) * p // 100) - 1)]
+
+    stats.update(pass_rate=sum(passed) / len(passed), duration_p50=percentile(50), duration_p90=percentile(90),
+                 duration_max=ranked[-1])
+    if len(finished) >= 2:
+        older, newer = passed[:len(passed) // 2], passed[len(passed) // 2:]
+        stats["pass_rate_trend"] = sum(newer) / len(newer) - sum(older) / len(older)
+        mean_number = sum(numbers) / len(numbers)
+        mean_duration = sum(durations) / len(durations)
+        spread = sum((number - mean_number) ** 2 for number in numbers)
+        if spread:
+            stats["duration_trend"] = sum((number - mean_number) * (duration - mean_duration)
+                                          for number, duration in zip(numbers, durations)) / spread
+    return stats
+
+
+def _split_tree(tree):
+    """Splits a Jenkins tree parameter on its top level commas, eg. 'a,b[c,d]' -> ['a', 'b[c,d]']"""
+    fields, depth, start = [], 0, 0
+    for index, char in enumerate(tree):
+        if char in '[{':
+            depth += 1
+        elif char in ']}':
+            depth -= 1
+        elif char == ',' and not depth:
+            fields.append(tree[start:index])
+            start = index + 1
+    fields.append(tree[start:])
+    return [field for field in fields if field]
+
+
+def merge_tree_fields(fields):
+    """Merges Jenkins tree fields per key, so no key is requested twice
+
+    eg. ['lastBuild[number]', 'name', 'lastBuild[number,url]'] -> ('lastBuild[number,url]', 'name')
+    A key without subfields covers all of them, a {from,to} range is taken from the last field giving one.
+    :rtype: tuple
+    """
+    merged = {}
+    for field in fields:
+        key, bracket, rest = field.partition('[')
+        if not bracket:
+            merged[key] = None
+        elif merged.get(key, ()) is not None:
+            subfields, suffix = merged.get(key) or ([], '')
+            inner, _, new_suffix = rest.rpartition(']')
+            merged[key] = (subfields + _split_tree(inner), new_suffix or suffix)
+    return tuple(key if value is None else f"{key}[{','.join(merge_tree_fields(value[0]))}]{value[1]}"
+                 for key, value in merged.items())
+
+
+def _robot_times(status):
+    """(start, end, elapsed seconds) of a Robot <status>, start and end in ISO 8601, None when not recorded"""
+    if 'start' in status.attrib:
+        # Robot Framework 7 records the start and the elapsed seconds
+        start = datetime.fromisoformat(status.get('start'))
+        elapsed = float(status.get('elapsed', 0))
+        return start.isoformat(), (start + timedelta(seconds=elapsed)).isoformat(), elapsed
+    try:
+        start = datetime.strptime(status.get('starttime'), ROBOT_TIME_FORMAT)
+        end = datetime.strptime(status.get('endtime'), ROBOT_TIME_FORMAT)
+    except (TypeError, ValueError):
+        # N/A for keywords and tests that were not run
+        return None, None, None
+    return start.isoformat(), end.isoformat(), (end - start).total_seconds()
+
+
+def robot_records(file_name, keywords=False):
+    """Streams a Robot Framework output.xml, with memory bounded by its nesting depth rather than its size
+
+    Every element is dropped from the tree once it has been read. Records are yielded as their element ends,
+    so a suite comes after its tests and child suites:
+      {type: 'test', longname, name, suite, status, start, end, elapsed, tags, message}
+      {type: 'suite', longname, name, suite, status, start, end, elapsed, message, passed, failed, skipped}
+      {type: 'keyword', name, library, kw_type, owner, owner_type, depth, recursive, status, start, end, elapsed,
+       self_elapsed, children, last_child_elapsed, message}
+    suite is the longname of the parent suite, None for the top level one. The counts of a suite include its
+    child suites. Keywords are only yielded when asked for, owner is the longname of the test or suite running
+    them and depth 0 for the keywords it calls directly. recursive is set when the same keyword is already
+    running further up. self_elapsed leaves out the time of the children keywords called, last_child_elapsed
+    is the time of the last of them, eg. the successful attempt of a Wait Until Keyword Succeeds.
+    """
+    from xml.etree.ElementTree import iterparse
+    elements = []
+    # The suites and the test being read, outermost first
+    frames = []
+    for event, element in iterparse(file_name, events=('start', 'end')):
+        if event == 'start':
+            parent = elements[-1].tag if elements else None
+            elements.append(element)
+            if (element.tag == 'suite' and parent in ('robot', 'suite')) or (element.tag == 'test' and parent == 'suite'):
+                suite = frames[-1]['longname'] if frames else None
+                name = element.get('name')
+                frames.append({
+                    "element": element, "type": element.tag, "longname": f"{suite}.{name}" if suite else name,
+                    "name": name, "suite": suite, "status": None, "start": None, "end": None, "elapsed": None,
+                    "message": "",
+                })
+                if element.tag == 'test':
+                    frames[-1]["tags"] = []
+                else:
+                    frames[-1].update(passed=0, failed=0, skipped=0)
+            elif keywords and element.tag == 'kw' and frames:
+                caller = frames[-1]
+                in_keyword = caller['type'] == 'keyword'
+                name, library = element.get('name'), element.get('library')
+                # Robot Framework 3 writes lower case types and 'kw' for plain keywords
+                kw_type = element.get('type', 'KEYWORD').upper()
+                frames.append({
+                    "element": element, "type": "keyword", "name": name, "library": library,
+                    "kw_type": 'KEYWORD' if kw_type == 'KW' else kw_type,
+                    "owner": caller['owner'] if in_keyword else caller['longname'],
+                    "owner_type": caller['owner_type'] if in_keyword else caller['type'],
+                    "depth": caller['depth'] + 1 if in_keyword else 0,
+                    "recursive": any(frame['type'] == 'keyword' and frame['name'] == name
+                                     and frame['library'] == library for frame in frames),
+                    "status": None, "start": None, "end": None, "elapsed": None, "self_elapsed": None,
+                    "children": 0, "children_elapsed": 0.0, "last_child_elapsed": None, "message": "",
+                })
+            continue
+        elements.pop()
+        owner = elements[-1] if elements else None
+        frame = frames[-1] if frames else None
+        if frame is not None and owner is frame['element']:
+            if element.tag == 'status':
+                frame['status'] = element.get('status')
+                frame['start'], frame['end'], frame['elapsed'] = _robot_times(element)
+                frame['message'] = (element.text or '').strip()
+            elif element.tag == 'tag' and frame['type'] == 'test':
+                frame['tags'].append(element.text)
+        elif frame is not None and element is frame['element']:
+            frames.pop()
+            del frame['element']
+            if frame['type'] == 'keyword':
+                children_elapsed = frame.pop('children_elapsed')
+                if frame['elapsed'] is not None:
+                    frame['self_elapsed'] = max(0.0, frame['elapsed'] - children_elapsed)
+                    if frames[-1]['type'] == 'keyword':
+                        frames[-1]['children'] += 1
+                        frames[-1]['children_elapsed'] += frame['elapsed']
+                        frames[-1]['last_child_elapsed'] = frame['elapsed']
+            elif frames:
+                parent = frames[-1]
+                if frame['type'] == 'test':
+                    counted = ROBOT_STATUS_COUNTS.get(frame['status'])
+                    if counted:
+                        parent[counted] += 1
+                else:
+                    for counted in ('passed', 'failed', 'skipped'):
+                        parent[counted] += frame[counted]
+            yield frame
+        if owner is not None:
+            owner.remove(element)
+
 
-from robot.api import ExecutionResult, ResultVisitor
+@lru_cache(maxsize=None)
+def robot_visitors():
+    """Builds the Robot result visitors, robot.api is only imported when a strategy parses Robot output"""
+    from robot.api import ResultVisitor
+
+    class AllTestResults(ResultVisitor):
+        def visit_test(self, test):
+            print(f'{test.longname} | {test.status}')
+
+    class FailedTests(ResultVisitor):
+        def visit_test(self, test, result='FAIL'):
+            if test.status == 'FAIL':
+                print(f'{test.longname} | {test.status}')
+
+    class PassedTests(ResultVisitor):
+        def visit_test(self, test):
+            result = []
+            if test.status == 'PASS':
+                result.append(f'{test.longname} | {test.status}')
+            return result
+
+    class TestBodies(ResultVisitor):
+        def visit_test(self, test):
+            print(f'{test.longname} | {test.status} | {[line for line in test.body]}')
+
+    return SimpleNamespace(
+        AllTestResults=AllTestResults, FailedTests=FailedTests, PassedTests=PassedTests, TestBodies=TestBodies
+    )
 
 
 class JenkinsTool:
 
-    def __init__(self):
+    def __init__(self, sessions=None):
         self.username = os.environ['jenkins_script_user']
         # Login to jenkins > Click username > Configure > Show Legacy API token
         self.token = os.environ['jenkins_script_token']
-        self.user = self.User(self.username, self.token).login_to_jenkins()
+        self.user = self.User(self.username, self.token, sessions).login_to_jenkins()
         self.server = self.Server(self.user.get_server_instance())
 
     class User:
-        def __init__(self, username, token):
-            self.jenkins_url = "jenkins build master url here"
+        def __init__(self, username, token, sessions=None):
+            self.jenkins_url = os.environ.get('jenkins_url', "jenkins build master url here")
             self.username = username
             self.token = token
+            self.sessions = sessions
             self.server = None
 
         def login_to_jenkins(self):
-            self.server = J_LIB(self.jenkins_url, username=self.username, password=self.token)
+            if self.sessions:
+                self.server = LimitedJenkins(self.jenkins_url, username=self.username, password=self.token,
+                                             timeout=self.sessions.timeout)
+                # python-jenkins keeps its own requests session, swap in the shared pooled one, wrapped so the
+                # Jenkins auth python-jenkins sets on it stays with this tool
+                self.server._session = self.Requests(self.sessions.session(self.jenkins_url), self.server._session)
+            else:
+                self.server = LimitedJenkins(self.jenkins_url, username=self.username, password=self.token)
             return self
 
         def get_server_instance(self):
             return self.server
 
+        class Requests:
+            """The shared session of the Jenkins host, as python-jenkins uses it, with Jenkins' auth, headers and
+            verify added per request, so they do not leak to other tools using the same host"""
+
+            def __init__(self, http, own_session):
+                self.http = http
+                self.auth = None
+                # JENKINS_API_EXTRA_HEADERS, set by python-jenkins on its own session
+                defaults = requests.utils.default_headers()
+                self.headers = {name: value for name, value in own_session.headers.items()
+                                if defaults.get(name) != value}
+                # PYTHONHTTPSVERIFY=0 turns verification off for python-jenkins, the registry decides otherwise
+                self.verify = http.verify if own_session.verify is not False else False
+
+            def prepare_request(self, request):
+                request.auth = request.auth or self.auth
+                request.headers = {**self.headers, **(request.headers or {})}
+                return self.http.prepare_request(request)
+
+            def merge_environment_settings(self, url, proxies, stream, verify, cert):
+                return self.http.merge_environment_settings(url, proxies, stream, verify, cert)
+
+            def send(self, request, **kwargs):
+                return self.http.send(request, **kwargs)
+
+            def request(self, method, url, headers=None, **kwargs):
+                kwargs.setdefault('auth', self.auth)
+                kwargs.setdefault('verify', self.verify)
+                return self.http.request(method, url, headers={**self.headers, **(headers or {})}, **kwargs)
+
+            def get(self, url, **kwargs):
+                return self.request('GET', url, **kwargs)
+
+            def head(self, url, **kwargs):
+                return self.request('HEAD', url, **kwargs)
+
         def get_user_details(self):
             user_details = self.server.get_whoami()
             return {
@@ -43,7 +450,7 @@ class JenkinsTool:
             self.nodes = self.Nodes(self.server)
             self.views = self.Views(self.server)
             self.jobs = self.Jobs(self.server)
-            self.builds = self.Builds(self.server)
+            self.builds = self.Builds(self.server, self.jobs)
 
         def info(self):
             return self.server.get_info()
@@ -98,9 +505,90 @@ class JenkinsTool:
             def config_by_name(self, name):
                 return self.server.get_view_config(name)
 
+            @staticmethod
+            def view_path(name):
+                """Nested views can be given as 'Parent/Child', they become view/Parent/view/Child"""
+                return "view/" + "/view/".join(quote(part, safe='') for part in name.strip('/').split('/'))
+
+            def health_report(self, name):
+                """Health of every job in view name, in a single tree filtered request
+                :return: [ {Name, Description, Score, LastBuild} ] for jobs that have a health report
+                :rtype: list(dict)
+                """
+                tree = "jobs[name,healthReport[description,score],lastBuild[number,result]]"
+                url = self.server._build_url(f"{self.view_path(name)}/api/json?tree={tree}")
+                view = json.loads(self.server.jenkins_open(requests.Request('GET', url)))
+                return [
+                    {
+                        "Name": job['name'],
+                        "Description": job['healthReport'][0]['description'],
+                        "Score": job['healthReport'][0]['score'],
+                        "LastBuild": job['lastBuild'],
+                    }
+                    for job in view.get('jobs', [])
+                    if job.get('healthReport')
+                ]
+
         class Jobs:
-            def __init__(self, server):
+            def __init__(self, server, info_ttl=JOB_INFO_TTL):
                 self.server = server
+                self.info_ttl = info_ttl
+                # name -> (fetched at, projected fields or None for the full info, info)
+                self._info = {}
+
+            def map_jobs(self, names, operation, max_workers=MASTER_CONCURRENCY, timeout=None):
+                """Runs operation for every job concurrently, see map_jobs() at module level
+
+                :param callable|str operation: a callable taking the job name, or the name of a Jobs method
+                """
+                if isinstance(operation, str):
+                    operation = getattr(self, operation)
+                return map_jobs(self.server, list(names), operation, max_workers, timeout)
+
+            def invalidate(self, name=None):
+                """Forget cached job info for name, or for every job"""
+                if name is None:
+                    self._info.clear()
+                else:
+                    self._info.pop(name, None)
+
+            def info_by_name(self, name, fields=None):
+                """Job info, reused for info_ttl seconds
+
+                :param str name: job name
+                :param list fields: only fetch these tree fields, eg. ['name', 'lastBuild[number]']
+                :return: full job info, or only the requested fields
+                :rtype: dict
+                """
+                fields = merge_tree_fields(fields) if fields else None
+                cached = self._info.get(name)
+                fresh = cached and time.monotonic() - cached[0] <= self.info_ttl
+                if fresh:
+                    cached_fields, info = cached[1], cached[2]
+                    if cached_fields is None and fields is None:
+                        return copy.deepcopy(info)
+                    if fields and (cached_fields is None
+                                   or merge_tree_fields(cached_fields + fields) == cached_fields):
+                        return self._project(info, fields)
+                if fields is None:
+                    info = self.server.get_job_info(name)
+                else:
+                    if fresh and cached[1]:
+                        # Widen the cached projection rather than keep two partial copies
+                        fields = merge_tree_fields(cached[1] + fields)
+                    info = self._fetch_fields(name, fields)
+                self._info[name] = (time.monotonic(), fields, info)
+                return copy.deepcopy(info) if fields is None else self._project(info, fields)
+
+            @staticmethod
+            def _project(info, fields):
+                """A copy of the fields' keys of info, callers may change it without touching the cache"""
+                keys = [field.split('[', 1)[0] for field in fields]
+                return {key: copy.deepcopy(info[key]) for key in keys if key in info}
+
+            def _fetch_fields(self, name, fields):
+                url = job_url(self.server, name, 'api/json?tree=' + ','.join(fields))
+                return json.loads(self.server.jenkins_open(requests.Request('GET', url)))
 
             def all(self):
                 return self.server.get_all_jobs()
@@ -109,70 +597,221 @@ class JenkinsTool:
                 return self.server.jobs_count()
 
             def health_report(self, name):
-                if len(self.server.get_job_info(name)['healthReport']) > 0:
+                health = self.info_by_name(name, ['healthReport[description,score]'])['healthReport']
+                if len(health) > 0:
                     return {
                         "Name": name,
-                        "Description": self.server.get_job_info(name)['healthReport'][0]['description'],
-                        "Score": self.server.get_job_info(name)['healthReport'][0]['score']
+                        "Description": health[0]['description'],
+                        "Score": health[0]['score']
                     }
 
             def all_by_view_name(self, view_name):
                 return self.server.get_jobs(view_name=view_name)
 
-            def info_by_name(self, name):
-                return self.server.get_job_info(name)
-
             def debug_info_by_name(self, name):
                 return self.server.debug_job_info(name)
 
             def last_build_number_by_name(self, name):
-                return self.server.get_job_info(name)['lastBuild']['number']
+                return self.info_by_name(name, ['lastBuild[number]'])['lastBuild']['number']
+
+            def build_history(self, name, limit=30):
+                """Number, result, duration and timestamp of the last limit builds, in one tree filtered request
+                :return: {number: [...], result: [...], duration: [...], timestamp: [...]}, newest build first,
+                         result is None for builds still running
+                :rtype: dict
+                """
+                columns = ('number', 'result', 'duration', 'timestamp')
+                builds = self._fetch_fields(name, [f"allBuilds[{','.join(columns)}]{{0,{int(limit)}}}"])['allBuilds']
+                return {column: [build[column] for build in builds] for column in columns}
+
+            def build_trends(self, names, limit=30, max_workers=MASTER_CONCURRENCY):
+                """build_history and its history_stats for every job, fetched concurrently
+                :return: [ {name, result, error} ] as map_jobs(), result is {history, stats}
+                :rtype: list(dict)
+                """
+                def trends(name):
+                    history = self.build_history(name, limit)
+                    return {"history": history, "stats": history_stats(history)}
+
+                return self.map_jobs(names, trends, max_workers)
 
             def config_by_name(self, name):
                 return self.server.get_job_config(name)
 
             def trigger_build_by_name(self, name):
                 """
-                This method returns a queue item number that you can pass to Builds.get_build_info(name, <HERE>).
+                This method returns a queue item number that you can pass to Builds.wait_for_build(name, <HERE>).
                 Note that this queue number is only valid for about five minutes after the job completes,
                 so you should get/poll the queue information as soon as possible to determine the job’s URL.
                 :param name:
                 :return:
                 """
-                return self.server.build_job(name)
+                queue_item = self.server.build_job(name)
+                self.invalidate(name)
+                return queue_item
 
             def create(self, name, config_xml):
                 self.server.create_job(name, config_xml)
+                self.invalidate(name)
 
             def copy(self, from_name, to_name):
                 self.server.copy_job(from_name, to_name)
+                self.invalidate(to_name)
 
             def rename(self, from_name, to_name):
                 self.server.rename_job(from_name, to_name)
+                self.invalidate(from_name)
+                self.invalidate(to_name)
 
             def _delete_job_USE_WITH_EXTREME_CAUTION(self, name):
                 self.server.delete_job(name)
+                self.invalidate(name)
 
             def enable(self, name):
                 self.server.enable_job(name)
+                self.invalidate(name)
 
             def disable(self, name):
                 self.server.disable_job(name)
+                self.invalidate(name)
 
             def exists(self, name) -> bool:
                 return self.server.job_exists(name)
 
             def reconfigure(self, name, config_xml):
                 self.server.reconfig_job(name, config_xml)
+                self.invalidate(name)
 
         class Builds:
-            def __init__(self, server):
+            def __init__(self, server, jobs):
                 self.server = server
+                self.jobs = jobs
+                self.http = server._session
                 self.robot = self.Robot(self)
+                self.console_cache = self.ConsoleCache(self)
 
-            def console_output(self, job_name, number):
+            def map_jobs(self, names, operation, max_workers=MASTER_CONCURRENCY, timeout=None):
+                """Runs operation for every job, or (job_name, number) tuple, concurrently, see map_jobs() at module level
+
+                :param callable|str operation: a callable taking the entry, or the name of a Builds method
+                """
+                if isinstance(operation, str):
+                    operation = getattr(self, operation)
+                return map_jobs(self.server, list(names), operation, max_workers, timeout)
+
+            def console_output(self, job_name, number, use_cache=True):
+                """Full console text, served from the local console cache unless use_cache is False"""
+                if use_cache:
+                    return self.console_cache.read(job_name, number)
                 return self.server.get_build_console_output(job_name, number)
 
+            def is_building(self, job_name, number):
+                url = job_url(self.server, job_name, 'api/json?tree=building', number)
+                return json.loads(self.server.jenkins_open(requests.Request('GET', url)))['building']
+
+            def wait_for_build(self, job_name, queue_item, timeout=None):
+                """Waits for one triggered build, see wait_for_builds
+                :return: {job_name, queue_item, number, result, duration, error}
+                :rtype: dict
+                """
+                return self.wait_for_builds([(job_name, queue_item)], timeout)[0]
+
+            def wait_for_builds(self, triggered, timeout=None, initial_interval=WAIT_POLL_INITIAL,
+                                max_interval=WAIT_POLL_MAX):
+                """Waits for triggered builds to finish, from a single polling loop
+
+                Queue items are resolved to build numbers as soon as they leave the queue, before Jenkins expires
+                them. Every build is polled on its own schedule, its interval doubling up to max_interval with
+                +/-25% jitter so builds triggered together do not poll the master in lockstep.
+                :param list triggered: (job_name, queue_item) tuples, queue_item as returned by trigger_build_by_name
+                :param float timeout: seconds to wait in total, builds not finished by then report a TimeoutError
+                :return: [ {job_name, queue_item, number, result, duration, error} ] in the order of triggered,
+                         result is None and error set when a build could not be followed to its end
+                :rtype: list(dict)
+                """
+                waits = [
+                    {"job_name": job_name, "queue_item": queue_item, "number": None, "result": None,
+                     "duration": None, "error": None, "interval": initial_interval, "next_poll": 0.0}
+                    for job_name, queue_item in triggered
+                ]
+                deadline = time.monotonic() + timeout if timeout is not None else None
+                pending = list(waits)
+                while pending:
+                    now = time.monotonic()
+                    for entry in [entry for entry in pending if entry['next_poll'] <= now]:
+                        try:
+                            finished = self._poll_triggered(entry)
+                        except Exception as e:
+                            entry['error'] = f"{type(e).__name__}: {e}"
+                            finished = True
+                        if finished:
+                            pending.remove(entry)
+                            continue
+                        jitter = random.uniform(0.75, 1.25)
+                        entry['next_poll'] = time.monotonic() + entry['interval'] * jitter
+                        entry['interval'] = min(entry['interval'] * 2, max_interval)
+                    if not pending:
+                        break
+                    next_poll = min(entry['next_poll'] for entry in pending)
+                    if deadline is not None and next_poll > deadline:
+                        for entry in pending:
+                            entry['error'] = f"TimeoutError: not finished in {timeout}s"
+                        break
+                    time.sleep(max(0.0, next_poll - time.monotonic()))
+                for entry in waits:
+                    del entry['interval'], entry['next_poll']
+                return waits
+
+            def _poll_triggered(self, entry):
+                """Advances one wait of wait_for_builds, returns True once it is finished"""
+                if entry['number'] is None:
+                    item = self.server.get_queue_item(entry['queue_item'])
+                    if item.get('cancelled'):
+                        entry['result'] = 'CANCELLED'
+                        return True
+                    if not item.get('executable'):
+                        return False
+                    entry['number'] = item['executable']['number']
+                url = job_url(self.server, entry['job_name'], 'api/json?tree=building,result,duration', entry['number'])
+                build = json.loads(self.server.jenkins_open(requests.Request('GET', url)))
+                if build['building']:
+                    return False
+                entry['result'] = build['result']
+                entry['duration'] = build['duration']
+                return True
+
+            def console_chunks(self, job_name, number, start=0, follow=False, poll_interval=2.0,
+                               chunk_size=64 * 1024):
+                """Streams a build console through Jenkins' progressive text endpoint
+
+                Yields (offset, text). Pass offset back as start to resume after that chunk. Jenkins only reports
+                the log offset at the end of each response, so earlier chunks of a response carry its start offset.
+                :param int start: log offset to start from, 0 for the whole console
+                :param bool follow: keep polling a running build for new output until it finishes
+                :param float poll_interval: seconds between polls in follow mode
+                """
+                url = job_url(self.server, job_name, 'logText/progressiveText', number)
+                self.server._maybe_add_auth()
+                while True:
+                    with http_permit():
+                        response = self.http.get(url, params={'start': start}, auth=self.server.auth, stream=True)
+                    response.raise_for_status()
+                    # Jenkins consoles are UTF-8, text/plain without a charset would otherwise decode as ISO-8859-1
+                    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+                    pending = None
+                    with response:
+                        for raw in response.iter_content(chunk_size):
+                            if pending:
+                                yield start, pending
+                            pending = decoder.decode(raw)
+                        pending = (pending or '') + decoder.decode(b'', final=True)
+                    start = int(response.headers.get('X-Text-Size', start))
+                    if pending:
+                        yield start, pending
+                    if not follow or response.headers.get('X-More-Data') != 'true':
+                        return
+                    time.sleep(poll_interval)
+
             def get_last_build_number(self, job_name):
                 return self.server.get_last_build_number(job_name)
 
@@ -198,68 +837,757 @@ class JenkinsTool:
             def delete(self, job_name, number):
                 self.server.delete_build(job_name, number)
 
-            def download_build_artifact(self, job_name, number, file_name=None, full_archive=False):
+            def build_url(self, job_name, number):
+                """Base url of a build, eg. http://jenkins/job/my_job/42/"""
+                return job_url(self.server, job_name, number=number)
+
+            def stream_download(self, url, output_path, progress=None, chunk_size=DOWNLOAD_CHUNK_SIZE,
+                                conditional=False):
+                """Streams url to output_path without holding the file in memory
+
+                Data goes to a .part file keyed by the url, so by job and build, which is renamed to output_path
+                once complete. A .part left by an interrupted download of the same url is resumed with an HTTP
+                Range request guarded by If-Range, with the ETag or Last-Modified kept next to it in .part.json.
+                A .part the server no longer matches is dropped and the download starts over.
+                :param callable progress: called as progress(bytes_done, bytes_total) after every chunk,
+                                          bytes_total is None when the server does not say
+                :param bool conditional: keep the ETag and Last-Modified of the download in output_path.meta.json
+                                         and revalidate an existing output_path with them, a 304 leaves it untouched
+                :return: output_path
+                """
+                output_path = Path(output_path)
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                part = Path(f"{output_path}.{hashlib.sha1(url.encode()).hexdigest()[:12]}.part")
+                part_meta = Path(f"{part}.json")
+                meta = Path(f"{output_path}.meta.json")
+                self.server._maybe_add_auth()
+                while True:
+                    headers = {}
+                    done = part.stat().st_size if part.exists() else 0
+                    resume_from = self._resume_validator(part_meta, url) if done else None
+                    if resume_from:
+                        headers.update({'Range': f'bytes={done}-', 'If-Range': resume_from})
+                    elif conditional and output_path.exists() and meta.exists():
+                        validators = json.loads(meta.read_text())
+                        if validators.get('etag'):
+                            headers['If-None-Match'] = validators['etag']
+                        if validators.get('last_modified'):
+                            headers['If-Modified-Since'] = validators['last_modified']
+                    with http_permit():
+                        response = self.http.get(url, headers=headers, auth=self.server.auth, stream=True)
+                    with response:
+                        if response.status_code == 304:
+                            print(f"--(( {output_path} is up to date ))")
+                            return output_path
+                        if resume_from and (response.status_code == 416 or (
+                                response.status_code == 206
+                                and not response.headers.get('Content-Range', '').startswith(f'bytes {done}-'))):
+                            # The .part does not fit the file on the server, eg. it is longer than it
+                            print(f"--(( Discarding {part}, it does not match {url} ))")
+                            part.unlink(missing_ok=True)
+                            part_meta.unlink(missing_ok=True)
+                            continue
+                        response.raise_for_status()
+                        validators = {
+                            'url': url,
+                            'etag': response.headers.get('ETag'),
+                            'last_modified': response.headers.get('Last-Modified'),
+                        }
+                        if response.status_code != 206:
+                            # A full response, If-Range failed because the file changed since the .part
+                            done = 0
+                            part_meta.write_text(json.dumps(validators))
+                        total = response.headers.get('Content-Length')
+                        total = int(total) + done if total is not None else None
+                        with open(part, 'ab' if done else 'wb') as out:
+                            for chunk in response.iter_content(chunk_size):
+                                out.write(chunk)
+                                done += len(chunk)
+                                if progress:
+                                    progress(done, total)
+                    break
+                os.replace(part, output_path)
+                part_meta.unlink(missing_ok=True)
+                if conditional:
+                    meta.write_text(json.dumps({key: validators[key] for key in ('etag', 'last_modified')}))
+                return output_path
+
+            @staticmethod
+            def _resume_validator(part_meta, url):
+                """The If-Range validator of a .part, None when it can not be resumed safely"""
+                try:
+                    validators = json.loads(part_meta.read_text())
+                except (OSError, ValueError):
+                    return None
+                if validators.get('url') != url:
+                    return None
+                etag = validators.get('etag')
+                # If-Range only takes a strong ETag
+                if etag and not etag.startswith('W/'):
+                    return etag
+                return validators.get('last_modified')
+
+            def artifacts(self, job_name, number, pattern=None):
+                """Artifacts of a build, listed from the build json in a single tree filtered request
+
+                :param str pattern: glob matched against the artifact relativePath, eg. "output/*.xml"
+                :return: [ {relativePath, fileName, md5} ], md5 is None when the artifact is not fingerprinted,
+                         fingerprints are matched on the path they were recorded with, so same named files in
+                         different directories never share one
+                :rtype: list(dict)
+                """
+                tree = "artifacts[relativePath,fileName],fingerprint[fileName,hash]"
+                url = self.server._build_url(f"{self.build_url(job_name, number)}api/json?tree={tree}")
+                build = json.loads(self.server.jenkins_open(requests.Request('GET', url)))
+                md5s = {fingerprint['fileName']: fingerprint['hash'] for fingerprint in build.get('fingerprint') or []}
+                return [
+                    {
+                        "relativePath": artifact['relativePath'],
+                        "fileName": artifact['fileName'],
+                        "md5": md5s.get(artifact['relativePath']),
+                    }
+                    for artifact in build.get('artifacts', [])
+                    if pattern is None or fnmatch.fnmatch(artifact['relativePath'], pattern)
+                ]
+
+            def download_artifacts(self, job_name, number, pattern, output_dir='output', max_workers=MASTER_CONCURRENCY):
+                """Downloads the artifacts matching pattern concurrently to output_dir/<relativePath>
+
+                Files already on disk are skipped when their size, and md5 when Jenkins fingerprinted them, match.
+                :param str pattern: glob matched against the artifact relativePath, eg. "output/*.xml"
+                :return: [ {name, result, error} ] as map_jobs(), result is {path, skipped}
+                :rtype: list(dict)
+                """
+                artifact_url = f"{self.build_url(job_name, number)}artifact/"
+                by_path = {artifact['relativePath']: artifact for artifact in self.artifacts(job_name, number, pattern)}
+                print(f"--(( Downloading {len(by_path)} artifacts matching {pattern} from {artifact_url}")
+                root = Path(output_dir).resolve()
+
+                def fetch(relative_path):
+                    url = artifact_url + quote(relative_path)
+                    path = (root / relative_path).resolve()
+                    if not path.is_relative_to(root):
+                        raise ValueError(f"Artifact {relative_path} would be written outside of {output_dir}")
+                    if self._matches_local(url, path, by_path[relative_path]['md5']):
+                        return {"path": str(path), "skipped": True}
+                    return {"path": str(self.stream_download(url, path)), "skipped": False}
+
+                return map_jobs(self.server, list(by_path), fetch, max_workers)
+
+            def _matches_local(self, url, path, md5=None):
+                if not path.is_file():
+                    return False
+                self.server._maybe_add_auth()
+                with http_permit():
+                    response = self.http.head(url, auth=self.server.auth, allow_redirects=True)
+                response.raise_for_status()
+                size = response.headers.get('Content-Length')
+                if size is None or int(size) != path.stat().st_size:
+                    return False
+                if md5 is None:
+                    return True
+                digest = hashlib.md5()
+                with open(path, 'rb') as local:
+                    for chunk in iter(lambda: local.read(DOWNLOAD_CHUNK_SIZE), b''):
+                        digest.update(chunk)
+                return digest.hexdigest() == md5
+
+            def download_build_artifact(self, job_name, number, file_name=None, full_archive=False, progress=None):
                 if (not file_name and not full_archive) or (file_name and full_archive):
                     raise Exception("Cannot have both or neither file_name and full_archive")
                 if full_archive:
-                    self.download_full_archive(job_name, number)
-                else:
-                    self.download_one_file_from_artifact(file_name, job_name, number)
+                    return self.download_full_archive(job_name, number, progress)
+                return self.download_one_file_from_artifact(file_name, job_name, number, progress)
 
-            def download_one_file_from_artifact(self, file_name, job_name, number):
-                print(f"--(( Downloading {file_name} from {self.server.server}{job_name}/{number}")
-                url = f"{self.server.server}/job/{job_name}/{number}/artifact/output/{file_name}"
-                with open(file_name, "wb") as out:
-                    out.write(requests.get(url).content)
+            def download_one_file_from_artifact(self, file_name, job_name, number, progress=None):
+                url = f"{self.build_url(job_name, number)}artifact/output/{file_name}"
+                print(f"--(( Downloading {file_name} from {url}")
+                return self.stream_download(url, file_name, progress)
 
-            def download_full_archive(self, job_name, number):
+            def download_full_archive(self, job_name, number, progress=None):
                 output_file = 'archive.zip'
                 output_path = f'output/{output_file}'
-                url = f"{self.server.server}/job/{job_name}/{number}/artifact/*zip*/{output_file}"
+                url = f"{self.build_url(job_name, number)}artifact/*zip*/{output_file}"
                 print(f"--(( Downloading robot report from {url} --> {output_path}))")
-                with open(output_path, "wb") as out:
-                    out.write(requests.get(url).content)
+                return self.stream_download(url, output_path, progress)
+
+            class ConsoleCache:
+                """On disk cache of build consoles, keyed by Jenkins master, job and build number
+
+                Finished builds are stored gzipped and never fetched again. Running builds are stored as the text
+                so far plus the Jenkins log offset, so the next read only fetches the new output.
+                """
+
+                def __init__(self, builds, directory=CONSOLE_CACHE_DIR, max_bytes=CONSOLE_CACHE_MAX_BYTES):
+                    self.builds = builds
+                    self.directory = Path(directory)
+                    self.max_bytes = max_bytes
+
+                def _base(self, job_name, number):
+                    master = hashlib.sha1(self.builds.server.server.encode()).hexdigest()[:12]
+                    job = hashlib.sha1(job_name.encode()).hexdigest()[:16]
+                    return self.directory / master / f"{job}-{number}"
+
+                @staticmethod
+                def _read(path, compressed=False):
+                    """Decodes a cached console, gzipped when compressed"""
+                    with (gzip.open(path, 'rb') if compressed else open(path, 'rb')) as cached:
+                        return codecs.decode(cached.read(), 'utf-8', 'replace')
+
+                @staticmethod
+                @contextmanager
+                def _locked(lock_path):
+                    """Holds an exclusive flock on lock_path, opening it again if evict removed it meanwhile"""
+                    while True:
+                        lock = open(lock_path, 'w')
+                        fcntl.flock(lock, fcntl.LOCK_EX)
+                        try:
+                            if os.stat(lock_path).st_ino == os.fstat(lock.fileno()).st_ino:
+                                break
+                        except FileNotFoundError:
+                            pass
+                        lock.close()
+                    with lock:
+                        yield
+
+                @staticmethod
+                def _compress(path, compress_to):
+                    """Gzips path to compress_to in chunks, creating compress_to even for an empty console"""
+                    with open(path, 'rb') as source, gzip.open(compress_to, 'wb') as out:
+                        shutil.copyfileobj(source, out, DOWNLOAD_CHUNK_SIZE)
+
+                def read(self, job_name, number):
+                    """Console text of a build, fetching only what the cache does not have yet"""
+                    base = self._base(job_name, number)
+                    finished = base.with_suffix('.log.gz')
+                    if finished.exists():
+                        os.utime(finished)
+                        return self._read(finished, compressed=True)
+
+                    base.parent.mkdir(parents=True, exist_ok=True)
+                    with self._locked(base.with_suffix('.lock')):
+                        text = self._update(job_name, number, base)
+                    self.evict()
+                    return text
+
+                def _update(self, job_name, number, base):
+                    partial, state_path = base.with_suffix('.part'), base.with_suffix('.offset')
+                    finished = base.with_suffix('.log.gz')
+                    if finished.exists():
+                        return self._read(finished, compressed=True)
+                    try:
+                        offset, length = json.loads(state_path.read_text())
+                    except (OSError, ValueError):
+                        offset, length = 0, 0
+                    # Checked before fetching, a build finishing meanwhile is finalised on the next read
+                    building = self.builds.is_building(job_name, number)
+                    with open(partial, 'ab') as out:
+                        # Drop anything written after the last recorded offset, eg. by an interrupted run
+                        out.truncate(length)
+                        for offset, text in self.builds.console_chunks(job_name, number, start=offset):
+                            out.write(text.encode('utf-8'))
+                        length = out.tell()
+                    if building:
+                        tmp_state = state_path.with_suffix('.tmp')
+                        tmp_state.write_text(json.dumps([offset, length]))
+                        os.replace(tmp_state, state_path)
+                        return self._read(partial)
+
+                    tmp_finished = base.with_suffix('.gz.tmp')
+                    text = self._read(partial)
+                    self._compress(partial, tmp_finished)
+                    os.replace(tmp_finished, finished)
+                    partial.unlink(missing_ok=True)
+                    state_path.unlink(missing_ok=True)
+                    return text
+
+                def evict(self):
+                    """Removes least recently used consoles until the cache fits in max_bytes, and the lock files
+                    of consoles that are no longer being updated"""
+                    entries = []
+                    for path in self.directory.glob('*/*'):
+                        if path.suffix in ('.gz', '.part'):
+                            try:
+                                stat = path.stat()
+                            except FileNotFoundError:
+                                continue
+                            entries.append((stat.st_mtime, stat.st_size, path))
+                    total = sum(size for _, size, _ in entries)
+                    for _, size, path in sorted(entries):
+                        if total <= self.max_bytes:
+                            break
+                        base = path.with_suffix('').with_suffix('') if path.suffix == '.gz' else path.with_suffix('')
+                        for stale in (path, base.with_suffix('.offset')):
+                            stale.unlink(missing_ok=True)
+                        total -= size
+                    for lock_path in self.directory.glob('*/*.lock'):
+                        if lock_path.with_suffix('.part').exists():
+                            continue
+                        try:
+                            lock = open(lock_path, 'rb')
+                        except FileNotFoundError:
+                            continue
+                        with lock:
+                            try:
+                                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                            except BlockingIOError:
+                                # Another process is updating this console
+                                continue
+                            # Only lock holders unlink, so the path still being this file means no one replaced it
+                            try:
+                                if os.stat(lock_path).st_ino == os.fstat(lock.fileno()).st_ino:
+                                    lock_path.unlink()
+                            except FileNotFoundError:
+                                pass
 
             class Robot:
                 def __init__(self, server):
                     self.server = server
+                    self.index = self.ResultIndex()
 
-                class AllTestResults(ResultVisitor):
-                    def visit_test(self, test):
-                        print(f'{test.longname} | {test.status}')
+                def __getattr__(self, name):
+                    if name in ROBOT_VISITORS:
+                        return getattr(robot_visitors(), name)
+                    raise AttributeError(name)
 
-                class FailedTests(ResultVisitor):
-                    def visit_test(self, test, result='FAIL'):
-                        if test.status == 'FAIL':
-                            print(f'{test.longname} | {test.status}')
+                @staticmethod
+                def output_path(job_name, number, output_file):
+                    """Where a robot file of a build is kept locally, eg. output/my_job/42/log_all.html"""
+                    return Path('output') / job_name / str(number) / output_file
 
-                class PassedTests(ResultVisitor):
-                    def visit_test(self, test):
-                        result = []
-                        if test.status == 'PASS':
-                            result.append(f'{test.longname} | {test.status}')
-                        return result
-
-                class TestBodies(ResultVisitor):
-                    def visit_test(self, test):
-                        print(f'{test.longname} | {test.status} | {[line for line in test.body]}')
+                def download_robot_file(self, job_name, number, output_file, progress=None):
+                    """Downloads a file of the build's robot report, revalidating a previous download of it
+                    :return: the local path of the file
+                    """
+                    output_path = self.output_path(job_name, number, output_file)
+                    url = f"{self.server.build_url(job_name, number)}robot/report/{output_file}"
+                    print(f"--(( Downloading robot report from {url} --> {output_path}))")
+                    return self.server.stream_download(url, output_path, progress, conditional=True)
 
-                def download_robot_log(self, job_name, number, custom_output_file=None):
+                def download_robot_log(self, job_name, number, custom_output_file=None, progress=None):
                     output_file = 'log_all.html' if not custom_output_file else custom_output_file
-                    output_path = f'output/{output_file}'
-                    url = f"{self.server.server}/job/{job_name}/{number}/robot/report/{output_file}"
-                    print(f"--(( Downloading robot report from {url} --> {output_path}))")
-                    with open(output_path, "wb") as out:
-                        out.write(requests.get(url).content)
+                    return self.download_robot_file(job_name, number, output_file, progress)
 
-                def download_robot_report(self, job_name, number, custom_output_file=None):
+                def download_robot_report(self, job_name, number, custom_output_file=None, progress=None):
                     output_file = 'report_all.html' if not custom_output_file else custom_output_file
-                    output_path = f'output/{output_file}'
-                    url = f"{self.server.server}/job/{job_name}/{number}/robot/report/{output_file}"
-                    print(f"--(( Downloading robot report from {url} --> {output_path}))")
-                    with open(output_path, "wb") as out:
-                        out.write(requests.get(url).content)
+                    return self.download_robot_file(job_name, number, output_file, progress)
 
                 def get_passed_tests(self, file_name):
-                    result = ExecutionResult(file_name)
-                    yield result.visit(self.PassedTests())
+                    for test in self.tests(file_name):
+                        if test['status'] == 'PASS':
+                            yield f"{test['longname']} | {test['status']}"
+
+                @staticmethod
+                def tests(file_name):
+                    """Streams the test records of a Robot output.xml, see robot_records()"""
+                    return (record for record in robot_records(file_name) if record['type'] == 'test')
+
+                @staticmethod
+                def summary(file_name):
+                    """Suite statistics and failed tests of a Robot output.xml, read in a single streaming pass
+                    :return: {total: {passed, failed, skipped}, suites: [ suite records ], failed: [ test records ]}
+                    :rtype: dict
+                    """
+                    total = {"passed": 0, "failed": 0, "skipped": 0}
+                    suites, failed = [], []
+                    for record in robot_records(file_name):
+                        if record['type'] == 'test':
+                            if record['status'] == 'FAIL':
+                                failed.append(record)
+                            continue
+                        suites.append(record)
+                        if record['suite'] is None:
+                            for counted in total:
+                                total[counted] += record[counted]
+                    return {"total": total, "suites": suites, "failed": failed}
+
+                def ingest(self, job_name, number, file_name=None):
+                    """Indexes the Robot results of a build, downloading its output.xml unless file_name is given
+                    :return: the counts of the indexed rows, see ResultIndex.ingest
+                    """
+                    if file_name is None:
+                        file_name = self.download_robot_file(job_name, number, 'output.xml')
+                    return self.index.ingest(job_name, number, file_name)
+
+                def recent_builds(self, job_name, count):
+                    """Numbers of the last count builds of job_name, oldest first"""
+                    last_build = self.server.jobs.last_build_number_by_name(job_name)
+                    return list(range(max(1, last_build - count + 1), last_build + 1))
+
+                def ingest_recent(self, job_name, count):
+                    """Indexes the last count builds of job_name, skipping those already in the index
+                    :return: [ {name, result, error} ] as map_jobs(), name is (job_name, number)
+                    :rtype: list(dict)
+                    """
+                    indexed = set(self.index.builds(job_name))
+                    return self.server.map_jobs(
+                        [(job_name, number) for number in self.recent_builds(job_name, count) if number not in indexed],
+                        self.ingest,
+                    )
+
+                def download_recent_outputs(self, job_name, count):
+                    """Downloads the output.xml of the last count builds of job_name concurrently
+                    :return: [ {name, result, error} ] as map_jobs(), name is (job_name, number), result the local path
+                    :rtype: list(dict)
+                    """
+                    return self.server.map_jobs(
+                        [(job_name, number) for number in self.recent_builds(job_name, count)],
+                        lambda job, number: self.download_robot_file(job, number, 'output.xml'),
+                    )
+
+                @staticmethod
+                def _test_results(file_name):
+                    """longname -> (status, elapsed, message) of every test, the only state Robot.diff keeps
+
+                    Messages are only kept for failures, the only ones diff compares.
+                    """
+                    return {test['longname']: (test['status'], test['elapsed'],
+                                               test['message'] if test['status'] == 'FAIL' else None)
+                            for test in robot_records(file_name)
+                            if test['type'] == 'test'}
+
+                @classmethod
+                def diff(cls, base_file, file_name, slower_ratio=ROBOT_DIFF_SLOWER_RATIO,
+                         slower_seconds=ROBOT_DIFF_SLOWER_SECONDS):
+                    """What changed from the Robot results in base_file to those in file_name, keyed by test longname
+
+                    Only base_file is held in memory, as a compact index, file_name is streamed against it. The two
+                    files are read one after the other, diff_builds overlaps indexing the base with the other download.
+                    :param float slower_ratio: a test is slower when its time grew by this ratio
+                    :param float slower_seconds: and by at least this many seconds
+                    :return: {new_failures: [ {longname, message} ], fixed: [ longname ],
+                              changed_messages: [ {longname, base_message, message} ],
+                              new_skips: [ {longname, base_status, message} ],
+                              unskipped: [ {longname, status, message} ],
+                              added: [ {longname, status} ], removed: [ {longname, status} ],
+                              slower: [ {longname, base_elapsed, elapsed} ]}
+                             new_skips are tests that passed or failed and are now skipped, unskipped the skipped
+                             tests that ran again, they are left out of new_failures and fixed
+                    :rtype: dict
+                    """
+                    return cls._diff_results(cls._test_results(base_file), file_name, slower_ratio, slower_seconds)
+
+                @staticmethod
+                def _diff_results(base, file_name, slower_ratio=ROBOT_DIFF_SLOWER_RATIO,
+                                  slower_seconds=ROBOT_DIFF_SLOWER_SECONDS):
+                    """Robot.diff of file_name against base, a _test_results() index that it empties"""
+                    diff = {"new_failures": [], "fixed": [], "changed_messages": [], "new_skips": [], "unskipped": [],
+                            "added": [], "removed": [], "slower": []}
+                    for test in robot_records(file_name):
+                        if test['type'] != 'test':
+                            continue
+                        longname, status, elapsed, message = (test['longname'], test['status'], test['elapsed'],
+                                                              test['message'])
+                        if longname not in base:
+                            diff['added'].append({"longname": longname, "status": status})
+                            continue
+                        base_status, base_elapsed, base_message = base.pop(longname)
+                        if status == 'SKIP' and base_status != 'SKIP':
+                            diff['new_skips'].append({"longname": longname, "base_status": base_status,
+                                                      "message": message})
+                        elif base_status == 'SKIP' and status != 'SKIP':
+                            diff['unskipped'].append({"longname": longname, "status": status, "message": message})
+                        elif status == 'FAIL' and base_status != 'FAIL':
+                            diff['new_failures'].append({"longname": longname, "message": message})
+                        elif status == 'PASS' and base_status == 'FAIL':
+                            diff['fixed'].append(longname)
+                        elif status == 'FAIL' and message != base_message:
+                            diff['changed_messages'].append(
+                                {"longname": longname, "base_message": base_message, "message": message})
+                        if base_elapsed is not None and elapsed is not None \
+                                and elapsed - base_elapsed >= max(slower_seconds, base_elapsed * slower_ratio):
+                            diff['slower'].append({"longname": longname, "base_elapsed": base_elapsed,
+                                                   "elapsed": elapsed})
+                    diff['removed'] = [{"longname": longname, "status": status}
+                                       for longname, (status, _, _) in base.items()]
+                    diff['slower'].sort(key=lambda test: test['elapsed'] - test['base_elapsed'], reverse=True)
+                    return diff
+
+                def diff_builds(self, job_name, base_number, number, **thresholds):
+                    """Robot.diff of two builds of job_name, their output.xml downloaded concurrently
+
+                    The base output is indexed as soon as it is downloaded, while the other one may still download.
+                    """
+                    def fetch(job, build, is_base):
+                        file_name = self.download_robot_file(job, build, 'output.xml')
+                        return self._test_results(file_name) if is_base else file_name
+
+                    downloads = self.server.map_jobs([(job_name, base_number, True), (job_name, number, False)], fetch)
+                    for download in downloads:
+                        if download['error']:
+                            raise Exception(f"Robot output of {job_name} #{download['name'][1]}: {download['error']}")
+                    return self._diff_results(downloads[0]['result'], downloads[1]['result'], **thresholds)
+
+                @staticmethod
+                def profile_keywords(file_names, top=20):
+                    """Keyword timings over one or many Robot output.xml files, each streamed once
+
+                    Only keywords, setups and teardowns are timed, loops, iterations and other control structures
+                    are not. total time counts a keyword once even when it calls itself further down, self time
+                    leaves out the keywords it calls. Retry overhead is the time a Wait Until Keyword Succeeds spent before its
+                    last attempt. Suite setup cost adds up the setup and teardown keywords of every suite.
+                    :return: {outputs, keywords: [ {name, library, calls, total, self, average, max} ] by self time,
+                              retries: {calls, attempts, overhead, by_owner: [ {owner, calls, attempts, overhead} ]},
+                              suite_setup: [ {suite, runs, setup, teardown} ] by setup time}
+                    :rtype: dict
+                    """
+                    keywords, retries, suites = {}, {}, {}
+                    outputs = 0
+                    for file_name in file_names:
+                        outputs += 1
+                        for record in robot_records(file_name, keywords=True):
+                            if record['type'] != 'keyword' or record['elapsed'] is None \
+                                    or record['kw_type'] not in ROBOT_PROFILED_KW_TYPES:
+                                continue
+                            stats = keywords.setdefault((record['name'], record['library']), {
+                                "name": record['name'], "library": record['library'], "calls": 0, "total": 0.0,
+                                "self": 0.0, "max": 0.0,
+                            })
+                            stats['calls'] += 1
+                            stats['self'] += record['self_elapsed']
+                            stats['max'] = max(stats['max'], record['elapsed'])
+                            if not record['recursive']:
+                                stats['total'] += record['elapsed']
+                            if record['name'] == 'Wait Until Keyword Succeeds' and record['children']:
+                                retry = retries.setdefault(record['owner'], {
+                                    "owner": record['owner'], "calls": 0, "attempts": 0, "overhead": 0.0,
+                                })
+                                retry['calls'] += 1
+                                retry['attempts'] += record['children']
+                                retry['overhead'] += record['elapsed'] - record['last_child_elapsed']
+                            if record['owner_type'] == 'suite' and record['depth'] == 0 \
+                                    and record['kw_type'] in ('SETUP', 'TEARDOWN'):
+                                suite = suites.setdefault(record['owner'], {
+                                    "suite": record['owner'], "runs": 0, "setup": 0.0, "teardown": 0.0,
+                                })
+                                if record['kw_type'] == 'SETUP':
+                                    suite['runs'] += 1
+                                    suite['setup'] += record['elapsed']
+                                else:
+                                    suite['teardown'] += record['elapsed']
+                    for stats in keywords.values():
+                        stats['average'] = stats['total'] / stats['calls']
+                    by_owner = sorted(retries.values(), key=lambda retry: retry['overhead'], reverse=True)
+                    return {
+                        "outputs": outputs,
+                        "keywords": sorted(keywords.values(), key=lambda stats: stats['self'], reverse=True)[:top],
+                        "retries": {
+                            "calls": sum(retry['calls'] for retry in by_owner),
+                            "attempts": sum(retry['attempts'] for retry in by_owner),
+                            "overhead": sum(retry['overhead'] for retry in by_owner),
+                            "by_owner": by_owner[:top],
+                        },
+                        "suite_setup": sorted(suites.values(), key=lambda suite: suite['setup'], reverse=True)[:top],
+                    }
+
+                class ResultIndex:
+                    """SQLite index of parsed Robot results, one set of suite, test and keyword rows per job and build
+
+                    Connections are opened per call, so the index can be used from map_jobs threads.
+                    """
+
+                    TABLES = """
+                        CREATE TABLE IF NOT EXISTS builds (
+                            job TEXT NOT NULL, build INTEGER NOT NULL, source TEXT, ingested REAL,
+                            PRIMARY KEY (job, build));
+                        CREATE TABLE IF NOT EXISTS suites (
+                            job TEXT NOT NULL, build INTEGER NOT NULL, longname TEXT NOT NULL, name TEXT, suite TEXT,
+                            status TEXT, start TEXT, end TEXT, elapsed REAL, message TEXT,
+                            passed INTEGER, failed INTEGER, skipped INTEGER);
+                        CREATE TABLE IF NOT EXISTS tests (
+                            job TEXT NOT NULL, build INTEGER NOT NULL, longname TEXT NOT NULL, name TEXT, suite TEXT,
+                            status TEXT, start TEXT, end TEXT, elapsed REAL, message TEXT, tags TEXT);
+                        CREATE TABLE IF NOT EXISTS keywords (
+                            job TEXT NOT NULL, build INTEGER NOT NULL, owner TEXT, name TEXT, library TEXT,
+                            kw_type TEXT, depth INTEGER, status TEXT, start TEXT, end TEXT, elapsed REAL);
+                    """
+                    SCHEMA = TABLES + """
+                        CREATE INDEX IF NOT EXISTS suites_build ON suites (job, build);
+                        CREATE INDEX IF NOT EXISTS tests_build ON tests (job, build, status);
+                        CREATE INDEX IF NOT EXISTS tests_longname ON tests (longname, job, build);
+                        CREATE INDEX IF NOT EXISTS tests_elapsed ON tests (job, elapsed);
+                        CREATE INDEX IF NOT EXISTS keywords_build ON keywords (job, build);
+                        CREATE INDEX IF NOT EXISTS keywords_name ON keywords (name, library);
+                    """
+                    # Keyword rows are staged in batches of this size while the output.xml is streamed
+                    BATCH_SIZE = 5000
+
+                    def __init__(self, path=ROBOT_INDEX_PATH):
+                        self.path = Path(path)
+                        self._schema_ready = False
+
+                    def connect(self):
+                        connection = sqlite3.connect(self.path, timeout=60)
+                        connection.row_factory = sqlite3.Row
+                        if not self._schema_ready:
+                            self.path.parent.mkdir(parents=True, exist_ok=True)
+                            connection.execute("PRAGMA journal_mode=WAL")
+                            connection.executescript(self.SCHEMA)
+                            self._schema_ready = True
+                        return connection
+
+                    def _query(self, sql, parameters=()):
+                        connection = self.connect()
+                        try:
+                            return [dict(row) for row in connection.execute(sql, parameters)]
+                        finally:
+                            connection.close()
+
+                    def ingest(self, job_name, number, file_name):
+                        """Parses file_name once, replacing whatever was indexed for the build before
+
+                        The rows are first staged in a private database, so the index is only locked for the short
+                        transaction copying them over and concurrent ingests do not wait for each other's parsing.
+                        :return: {suites, tests, keywords} row counts
+                        :rtype: dict
+                        """
+                        self.path.parent.mkdir(parents=True, exist_ok=True)
+                        with tempfile.TemporaryDirectory(dir=self.path.parent, prefix="robot-ingest-") as staging_dir:
+                            staging_path = Path(staging_dir) / "staging.sqlite3"
+                            staging = sqlite3.connect(staging_path)
+                            try:
+                                staging.execute("PRAGMA journal_mode=OFF")
+                                staging.executescript(self.TABLES)
+                                with staging:
+                                    counts = self._stage(staging, job_name, number, file_name)
+                            finally:
+                                staging.close()
+                            connection = self.connect()
+                            try:
+                                connection.execute("ATTACH DATABASE ? AS staging", (str(staging_path),))
+                                with connection:
+                                    for table in ('builds', 'suites', 'tests', 'keywords'):
+                                        connection.execute(f"DELETE FROM {table} WHERE job = ? AND build = ?",
+                                                           (job_name, number))
+                                        connection.execute(f"INSERT INTO {table} SELECT * FROM staging.{table}")
+                            finally:
+                                connection.close()
+                        return counts
+
+                    def _stage(self, connection, job_name, number, file_name):
+                        counts = {"suites": 0, "tests": 0, "keywords": 0}
+                        keywords = []
+                        key = (job_name, number)
+                        for record in robot_records(file_name, keywords=True):
+                            if record['type'] == 'keyword':
+                                keywords.append(key + (
+                                    record['owner'], record['name'], record['library'], record['kw_type'],
+                                    record['depth'], record['status'], record['start'], record['end'],
+                                    record['elapsed'],
+                                ))
+                                if len(keywords) >= self.BATCH_SIZE:
+                                    self._insert_keywords(connection, keywords)
+                                    counts['keywords'] += len(keywords)
+                                    keywords = []
+                            elif record['type'] == 'test':
+                                connection.execute(
+                                    "INSERT INTO tests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                    key + (record['longname'], record['name'], record['suite'], record['status'],
+                                           record['start'], record['end'], record['elapsed'], record['message'],
+                                           json.dumps(record['tags'])),
+                                )
+                                counts['tests'] += 1
+                            else:
+                                connection.execute(
+                                    "INSERT INTO suites VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                    key + (record['longname'], record['name'], record['suite'], record['status'],
+                                           record['start'], record['end'], record['elapsed'], record['message'],
+                                           record['passed'], record['failed'], record['skipped']),
+                                )
+                                counts['suites'] += 1
+                        self._insert_keywords(connection, keywords)
+                        counts['keywords'] += len(keywords)
+                        connection.execute("INSERT INTO builds VALUES (?, ?, ?, ?)",
+                                           key + (str(file_name), time.time()))
+                        return counts
+
+                    @staticmethod
+                    def _insert_keywords(connection, keywords):
+                        connection.executemany("INSERT INTO keywords VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                               keywords)
+
+                    def builds(self, job_name):
+                        """Build numbers of job_name already in the index, newest first"""
+                        rows = self._query("SELECT build FROM builds WHERE job = ? ORDER BY build DESC", (job_name,))
+                        return [row['build'] for row in rows]
+
+                    def failures(self, job_name, number):
+                        """Failed tests of a build, [ {longname, message, elapsed} ]"""
+                        return self._query(
+                            "SELECT longname, message, elapsed FROM tests "
+                            "WHERE job = ? AND build = ? AND status = 'FAIL' ORDER BY longname",
+                            (job_name, number),
+                        )
+
+                    def test_history(self, longname, job_name=None, limit=20):
+                        """Results of one test in the last limit indexed builds, [ {job, build, status, elapsed, message} ]
+                        newest first, across all jobs unless job_name is given
+                        """
+                        return self._query(
+                            "SELECT job, build, status, elapsed, message FROM tests "
+                            "WHERE longname = ? AND (? IS NULL OR job = ?) ORDER BY build DESC LIMIT ?",
+                            (longname, job_name, job_name, limit),
+                        )
+
+                    def slowest_tests(self, job_name, number=None, limit=10):
+                        """Slowest tests of a build, or on average over all indexed builds of job_name when number is None
+                        :return: [ {longname, elapsed, max_elapsed, builds} ]
+                        """
+                        return self._query(
+                            "SELECT longname, AVG(elapsed) AS elapsed, MAX(elapsed) AS max_elapsed, "
+                            "COUNT(DISTINCT build) AS builds FROM tests WHERE job = ? AND (? IS NULL OR build = ?) "
+                            "GROUP BY longname ORDER BY elapsed DESC LIMIT ?",
+                            (job_name, number, number, limit),
+                        )
+
+                    def flaky_tests(self, job_names, builds=20, limit=25, last_builds=None):
+                        """Ranks the tests that both passed and failed in the last builds Jenkins builds of each job
+
+                        The window is a range of build numbers ending at the job's last build, so builds missing from
+                        the index shrink it rather than pull in older ones. last_builds maps job names to their last
+                        Jenkins build number, the newest indexed build is used for jobs it does not give.
+
+                        flip_rate is the share of consecutive runs whose status changed. clustering is the share of
+                        failures that directly follow another failure, high for a test that broke and stayed broken.
+                        score = flip_rate * (1 - clustering), so scattered failures rank above a real breakage.
+                        :return: [ {job, longname, runs, failures, flips, flip_rate, clustering, score,
+                                    last_failure} ] highest score first
+                        :rtype: list(dict)
+                        """
+                        last_builds = dict(last_builds or {})
+                        for job_name in job_names:
+                            if last_builds.get(job_name) is None:
+                                last_builds[job_name] = self._query(
+                                    "SELECT MAX(build) AS last FROM builds WHERE job = ?", (job_name,))[0]['last']
+                        windows = [(job_name, last_builds[job_name] - builds) for job_name in job_names
+                                   if last_builds[job_name] is not None]
+                        if not windows:
+                            return []
+                        return self._query(
+                            f"""
+                            WITH windows (job, after) AS (VALUES {', '.join(['(?, ?)'] * len(windows))}),
+                            runs AS (
+                                SELECT tests.job, tests.longname, tests.build, tests.status,
+                                       LAG(tests.status) OVER (PARTITION BY tests.job, tests.longname
+                                                               ORDER BY tests.build) AS previous
+                                FROM tests JOIN windows ON tests.job = windows.job AND tests.build > windows.after
+                                WHERE tests.status IN ('PASS', 'FAIL')),
+                            counts AS (
+                                SELECT job, longname, COUNT(*) AS runs,
+                                       SUM(status = 'FAIL') AS failures,
+                                       SUM(previous IS NOT NULL AND previous != status) AS flips,
+                                       SUM(status = 'FAIL' AND previous = 'FAIL') AS repeated,
+                                       MAX(CASE WHEN status = 'FAIL' THEN build END) AS last_failure
+                                FROM runs GROUP BY job, longname
+                                HAVING failures > 0 AND failures < runs),
+                            rates AS (
+                                SELECT job, longname, runs, failures, flips, last_failure,
+                                       CAST(flips AS REAL) / (runs - 1) AS flip_rate,
+                                       CAST(repeated AS REAL) / failures AS clustering
+                                FROM counts)
+                            SELECT job, longname, runs, failures, flips, flip_rate, clustering,
+                                   flip_rate * (1 - clustering) AS score, last_failure
+                            FROM rates ORDER BY score DESC, failures DESC LIMIT ?
+                            """,
+                            (*(value for window in windows for value in window), limit),
+                        )
@@ -3,8 +3,9 @@ import os
 
 
 class JiraTool:
-    def __init__(self):
-        self.url = 'jira_url_here'
+    def __init__(self, sessions=None):
+        self.url = os.environ.get('jira_url', 'jira_url_here')
+        self.sessions = sessions
         self.session = self.Session(self)
         self.project = self.Project(self.session, "project_here")
         self.issue = self.Issue(self.session)
@@ -14,18 +15,42 @@ class JiraTool:
             self.jira = jira
             self.url = jira.url
             self.api_url = f"{self.url}/rest/api/2"
-            self.session = requests.Session()
-            self.session.auth = (os.environ['jira_script_user'], os.environ['jira_script_token'])
-            self.session.headers = {'Content-Type': 'application/json'}
-            self.session.verify = False
-            self.session.timeout = 60
-            self.session.stream = False
+            http = jira.sessions.session(self.url) if jira.sessions else requests.Session()
+            self.session = self.Requests(http, (os.environ['jira_script_user'], os.environ['jira_script_token']))
+
+        class Requests:
+            """The shared session of the Jira host, with Jira's auth and content type added per request, so they do not
+            leak to other tools using the same host. TLS verification is the registry's, a self-signed Jira can be
+            listed in dev_tools_http_insecure_hosts"""
+
+            def __init__(self, http, auth):
+                self.http = http
+                self.auth = auth
+
+            def request(self, method, url, headers=None, **kwargs):
+                kwargs.setdefault('auth', self.auth)
+                kwargs.setdefault('stream', False)
+                headers = {'Content-Type': 'application/json', **(headers or {})}
+                return self.http.request(method, url, headers=headers, **kwargs)
+
+            def get(self, url, **kwargs):
+                return self.request('GET', url, **kwargs)
+
+            def post(self, url, **kwargs):
+                return self.request('POST', url, **kwargs)
+
+            def put(self, url, **kwargs):
+                return self.request('PUT', url, **kwargs)
+
+            def delete(self, url, **kwargs):
+                return self.request('DELETE', url, **kwargs)
 
     class Project:
         def __init__(self, session, project):
             self.session = session
             self.url = f"{self.session.api_url}/project"
             self.project = project
+            self._create_meta = None
 
         def get(self, project_key):
             url = self.url + '/' + project_key
@@ -37,10 +62,12 @@ class JiraTool:
             response = self.session.session.get(url)
             return response.json()
 
-        def create_meta(self):
-            url = self.url + 'createmeta'
-            response = self.session.session.get(url)
-            return response.json()
+        def create_meta(self, refresh=False):
+            """createmeta rarely changes, it is fetched once per JiraTool unless refresh is set"""
+            if self._create_meta is None or refresh:
+                url = self.url + 'createmeta'
+                self._create_meta = self.session.session.get(url).json()
+            return self._create_meta
 
         def get_all_issue_types(self):
             for proj in self.create_meta()['projects']:
@@ -56,6 +83,7 @@ class JiraTool:
             self.attachment = self.Attachment(self.session)
             self.worklog = self.Worklog(self.session)
             self.project = self.session.jira.project.project
+            self._create_meta = None
 
         def get(self, issue_id):
             url = self.url + issue_id
@@ -73,10 +101,12 @@ class JiraTool:
                     for issue_type in proj['issuetypes']:
                         print(f"{issue_type['name']} - {issue_type['id']} - {issue_type['description']}")
 
-        def create_meta(self):
-            url = self.url + 'createmeta'
-            response = self.session.session.get(url)
-            return response.json()
+        def create_meta(self, refresh=False):
+            """createmeta rarely changes, it is fetched once per JiraTool unless refresh is set"""
+            if self._create_meta is None or refresh:
+                url = self.url + 'createmeta'
+                self._create_meta = self.session.session.get(url).json()
+            return self._create_meta
 
         def create(self, data):
             url = self.url
@@ -1,17 +1,34 @@
 import os
+import time
 from pathlib import Path
 
 
 class KarafTool:
-    def __init__(self):
+    def __init__(self, sessions=None):
         self.karaf_client = Path(os.environ['KARAF_CLIENT'])
+        # Karaf is driven through its client binary, the session registry is only used to report spans
+        self.sessions = sessions
         self.bundle = self.Bundle(self)
 
     def run_command(self, command):
-        command = command.split()
+        karaf_command = command
+        command = (command or '').split()
+        if not command:
+            raise ValueError("Usage: run_command('<karaf command> [arguments]'), got an empty command")
         command.insert(0, self.karaf_client.as_posix())
         command.insert(1, '--')
-        return os.system(' '.join(command))
+        start = time.perf_counter()
+        status = os.system(' '.join(command))
+        if self.sessions:
+            self.sessions.record({
+                "name": f"karaf {command[2]}",
+                "cat": "karaf",
+                "start": start,
+                "duration": time.perf_counter() - start,
+                "args": {"method": "karaf", "url_template": command[2], "url": karaf_command,
+                         "status": status, "bytes": 0, "retries": 0},
+            })
+        return status
 
     class Bundle:
         def __init__(self, karaf_tool):
@@ -0,0 +1,151 @@
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Transport settings for every tool, override with environment variables
+POOL_SIZE = int(os.environ.get('dev_tools_http_pool_size', 10))
+TIMEOUT = float(os.environ.get('dev_tools_http_timeout', 60))
+RETRIES = int(os.environ.get('dev_tools_http_retries', 2))
+VERIFY_TLS = os.environ.get('dev_tools_http_verify', 'true').lower() != 'false'
+# Comma separated hosts whose certificates are not verified, eg. https://jira.example.com for a self-signed one
+INSECURE_HOSTS = {host.strip().rstrip('/') for host in os.environ.get('dev_tools_http_insecure_hosts', '').split(',')
+                  if host.strip()}
+
+
+# Path segments following one of these are names or ids, not part of the endpoint
+NAMED_SEGMENTS = {'job', 'view', 'changes', 'accounts', 'projects', 'groups', 'issue', 'branches', 'tags', 'plugins'}
+
+
+def url_template(url):
+    """Reduces a url to its endpoint, eg. /job/my_job/42/api/json?depth=1 -> /job/{name}/{n}/api/json?depth={}"""
+    parts = urlsplit(url)
+    segments = parts.path.split('/')
+    for index, segment in enumerate(segments):
+        if segment.isdigit():
+            segments[index] = '{n}'
+        elif index and segments[index - 1] in NAMED_SEGMENTS and segment:
+            segments[index] = '{name}'
+    query = re.sub(r'=[^&]*', '={}', parts.query)
+    return '/'.join(segments) + (f'?{query}' if query else '')
+
+
+class Session(requests.Session):
+    """requests.Session that applies a default timeout to every request and reports a span per request"""
+
+    def __init__(self, timeout=TIMEOUT, registry=None):
+        super().__init__()
+        self.timeout = timeout
+        self.registry = registry
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+    def send(self, request, **kwargs):
+        if not (self.registry and self.registry.observers):
+            return super().send(request, **kwargs)
+        start = time.perf_counter()
+        response = None
+        try:
+            response = super().send(request, **kwargs)
+            return response
+        finally:
+            self.registry.record({
+                "name": f"{request.method} {url_template(request.url)}",
+                "cat": "http",
+                "start": start,
+                "duration": time.perf_counter() - start,
+                "args": {
+                    "method": request.method,
+                    "url_template": url_template(request.url),
+                    "url": request.url,
+                    "status": response.status_code if response is not None else None,
+                    "bytes": self._response_bytes(response, kwargs.get('stream', False)),
+                    "retries": len(getattr(getattr(getattr(response, 'raw', None), 'retries', None),
+                                           'history', ()) or ()),
+                },
+            })
+
+    @staticmethod
+    def _response_bytes(response, stream):
+        if response is None:
+            return 0
+        if not stream:
+            return len(response.content or b'')
+        return int(response.headers.get('Content-Length', 0))
+
+
+class SessionRegistry:
+    """Hands out one pooled, keep-alive Session per service host.
+
+    Use the process wide instance, `registry`, so every tool and strategy shares the same connection pools:
+        session = registry.session('https://jenkins.example.com/jenkins')
+    Sessions are shared by every tool talking to a host, so tools pass their own auth and headers per request
+    instead of setting them on the session. TLS verification is set here only: verify, dev_tools_http_verify, for
+    every host, and insecure_hosts, dev_tools_http_insecure_hosts, to turn it off for single hosts.
+    """
+
+    def __init__(self, pool_size=POOL_SIZE, timeout=TIMEOUT, retries=RETRIES, verify=VERIFY_TLS,
+                 insecure_hosts=INSECURE_HOSTS):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.verify = verify
+        self.insecure_hosts = {self.host(host) for host in insecure_hosts}
+        self._sessions = {}
+        self._lock = threading.Lock()
+        # Callables given a span dict for every request made through this registry, see record()
+        self.observers = []
+
+    @staticmethod
+    def host(url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}" if parts.netloc else url
+
+    def session(self, url):
+        """Returns the shared Session for the host of url, creating it on first use
+
+        :param str url: Any url on the service host
+        :rtype: Session
+        """
+        host = self.host(url)
+        with self._lock:
+            if host not in self._sessions:
+                self._sessions[host] = self._new_session(host)
+            return self._sessions[host]
+
+    def _new_session(self, host):
+        session = Session(timeout=self.timeout, registry=self)
+        session.verify = self.verify and host not in self.insecure_hosts
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=Retry(total=self.retries, backoff_factor=0.5, status_forcelist=(502, 503, 504),
+                              raise_on_status=False),
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def record(self, span):
+        """Passes a span, {name, cat, start, duration, args}, to every observer"""
+        for observer in self.observers:
+            observer(span)
+
+    def hosts(self):
+        return list(self._sessions)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+registry = SessionRegistry()
@@ -0,0 +1,163 @@
+"""
+Offline benchmark of every strategy against the local stubs in stubs.py.
+
+    python -m strategy_tool.benchmark.run [--latency-ms 20] [--jobs 60] [--compare results/<commit>.json]
+
+Each strategy runs cold in its own interpreter, so bootstrap cost and peak RSS are per strategy. The stubs count the
+requests and bytes each strategy causes. Results are saved to results/<commit>.json for comparison across commits.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .stubs import StubConfig, start_all, tool_environment
+
+REPO_ROOT = Path(os.path.dirname(__file__)).parent.parent
+RESULTS_DIR = Path(os.path.dirname(__file__)) / "results"
+
+# Arguments for each strategy, strategies missing here (the endless monitors) are skipped
+BENCHMARK_ARGS = {
+    "Test": [],
+    "ViewHealthReport": ["Nightly"],
+    "AllJobsInView": ["Nightly"],
+    "CloneJob": ["job_0", "job_0_clone"],
+    "BuildJob": ["job_0"],
+    "JobInfo": ["job_0"],
+    "JobHealthReport": ["job_0"],
+    "ViewBuildTrends": ["Nightly"],
+    "LastBuildConsoleOutput": ["job_0"],
+    "PullBuildArtifactsAndRobotReports": ["job_0", "30"],
+    "PullACCxDEVANYTESTBuildArtifacts": ["30"],
+    "IngestRobotResults": ["job_0", "5"],
+    "FlakyRobotTests": ["job_0,job_1", "5"],
+    "RobotKeywordProfile": ["job_0", "3"],
+    "DiffRobotBuilds": ["job_0", "30", "29"],
+    "CreateJiraFromLastJobsExecution": ["Nightly"],
+    "GetJiraIssue": ["IOTA-1"],
+    "LogWorkInJira": ["IOTA-1", "1h", "benchmark"],
+    "ElasticClusterState": ["_all"],
+    "ElasticClusterHealth": [],
+    "ElasticClusterStats": [],
+    "AllCurrentElasticTasks": [],
+    "ElasticIndexInfo": ["index-0"],
+    "SuggestAddGerritReviewers": ["xdn", "I0123456789"],
+    "AddTopicToGerritChange": ["xdn", "I0123456789", "benchmark"],
+}
+
+
+def run_child(strategy_name, args):
+    """Runs one strategy in this process and prints its measurements as JSON"""
+    start = time.perf_counter()
+    error = None
+    try:
+        from strategy_tool.strategies import strategies as Strategies
+        from strategy_tool.strategies.StrategyExecutor import Executor
+        result = Executor(getattr(Strategies, strategy_name)(*args)).execute_strategy()
+        if hasattr(result, '__next__'):
+            for _ in result:
+                pass
+    except Exception as exception:
+        error = f"{type(exception).__name__}: {exception}"
+    wall = time.perf_counter() - start
+    print(json.dumps({
+        "wall_seconds": round(wall, 4),
+        # ru_maxrss is KiB on Linux
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "error": error,
+    }))
+
+
+def run_strategy(strategy_name, args, servers, environment, work_dir):
+    before = {name: server.counters() for name, server in servers.items()}
+    completed = subprocess.run(
+        [sys.executable, "-m", "strategy_tool.benchmark.run", "--child", strategy_name, json.dumps(args)],
+        cwd=work_dir, env=environment, capture_output=True, text=True,
+    )
+    try:
+        measured = json.loads(completed.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        measured = {"wall_seconds": None, "peak_rss_kb": None, "error": completed.stderr.strip()[-500:]}
+    after = {name: server.counters() for name, server in servers.items()}
+    measured["requests"] = {name: after[name]["requests"] - before[name]["requests"] for name in servers}
+    measured["bytes"] = {name: after[name]["bytes"] - before[name]["bytes"] for name in servers}
+    return measured
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def report(results, baseline=None):
+    rows = [f"{'strategy':<36} {'wall s':>8} {'reqs':>6} {'KiB sent':>10} {'RSS MiB':>8}  {'vs baseline':<24} error"]
+    for name, measured in results["strategies"].items():
+        requests = sum(measured["requests"].values())
+        kib = sum(measured["bytes"].values()) / 1024
+        rss = (measured["peak_rss_kb"] or 0) / 1024
+        delta = ""
+        if baseline and name in baseline["strategies"] and baseline["strategies"][name]["wall_seconds"]:
+            old = baseline["strategies"][name]
+            delta = (f"{(measured['wall_seconds'] or 0) - old['wall_seconds']:+.3f}s "
+                     f"{requests - sum(old['requests'].values()):+d} reqs")
+        rows.append(f"{name:<36} {measured['wall_seconds'] or 0:>8.3f} {requests:>6} {kib:>10.1f} {rss:>8.1f}  "
+                    f"{delta:<24} {(measured['error'] or '')[:60]}")
+    return "\n".join(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=StubConfig.latency_ms)
+    parser.add_argument("--jobs", type=int, default=StubConfig.jobs_per_view, help="jobs per Jenkins view")
+    parser.add_argument("--builds", type=int, default=StubConfig.builds_per_job, help="builds per Jenkins job")
+    parser.add_argument("--console-kb", type=int, default=StubConfig.console_kb)
+    parser.add_argument("--artifact-kb", type=int, default=StubConfig.artifact_kb)
+    parser.add_argument("--strategies", help="comma separated strategies to run (default: all)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("child_args", nargs="?", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, json.loads(args.child_args))
+        return
+
+    config = StubConfig(args.latency_ms, args.jobs, args.builds, args.console_kb, args.artifact_kb)
+    servers = start_all(config)
+    environment = dict(os.environ, **tool_environment(servers), PYTHONPATH=str(REPO_ROOT))
+    selected = args.strategies.split(",") if args.strategies else list(BENCHMARK_ARGS)
+
+    results = {"commit": git_commit(), "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+               "config": vars(config), "strategies": {}}
+    with tempfile.TemporaryDirectory() as work_dir:
+        (Path(work_dir) / "output").mkdir()
+        # Keep the Robot results index and console cache of the runs out of the user's own
+        environment["jenkins_robot_index"] = str(Path(work_dir) / "robot_results.sqlite3")
+        environment["jenkins_console_cache_dir"] = str(Path(work_dir) / "consoles")
+        for name in selected:
+            results["strategies"][name] = run_strategy(name, BENCHMARK_ARGS[name], servers, environment, work_dir)
+            print(f"--(( {name} done ))", file=sys.stderr)
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    results_path = RESULTS_DIR / f"{results['commit']}.json"
+    with open(results_path, "w") as results_file:
+        json.dump(results, results_file, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+    print(report(results, baseline))
+    print(f"--(( Results written to {results_path} ))", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
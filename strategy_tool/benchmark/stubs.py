@@ -0,0 +1,345 @@
+"""
+Local stand-ins for Jenkins, Jira, Gerrit and Elasticsearch, serving canned but realistically shaped payloads.
+
+Each StubServer runs a ThreadingHTTPServer on 127.0.0.1 and counts the requests and response bytes it serves.
+StubConfig controls the added latency and the payload sizes.
+"""
+import io
+import json
+import os
+import re
+import threading
+import time
+import zipfile
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+ROBOT_OUTPUT = Path(os.path.dirname(__file__)).parent.parent / "jenkins_tool" / "output" / "sean.txt"
+GERRIT_MAGIC_PREFIX = b")]}'\n"
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 20
+    jobs_per_view: int = 60
+    builds_per_job: int = 30
+    console_kb: int = 512
+    artifact_kb: int = 4096
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, name, routes, config):
+        """
+        :param str name: service name, used in reports
+        :param list routes: [(method, path regex, responder(server, match, query) -> (status, headers, body))]
+        :param StubConfig config: latency and payload sizes
+        """
+        self.name = name
+        self.routes = [(method, re.compile(pattern), responder) for method, pattern, responder in routes]
+        self.config = config
+        self.requests = 0
+        self.bytes_sent = 0
+        self._count_lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), StubRequestHandler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def counters(self):
+        return {"requests": self.requests, "bytes": self.bytes_sent}
+
+    def count(self, body):
+        with self._count_lock:
+            self.requests += 1
+            self.bytes_sent += len(body)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name=f"stub-{self.name}", daemon=True).start()
+        return self
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self):
+        length = int(self.headers.get('Content-Length', 0))
+        if length:
+            self.rfile.read(length)
+        parts = urlsplit(self.path)
+        path = unquote(parts.path)
+        status, headers, body = 404, {}, b'{"error": "not stubbed"}'
+        for method, pattern, responder in self.server.routes:
+            match = pattern.fullmatch(path)
+            if method == self.command and match:
+                status, headers, body = responder(self.server, match, parts.query)
+                break
+        time.sleep(self.server.config.latency_ms / 1000)
+        self.server.count(body)
+        self.send_response(status)
+        headers.setdefault('Content-Type', 'application/json')
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = _handle
+
+
+def as_json(payload, status=200, prefix=b""):
+    return status, {}, prefix + json.dumps(payload).encode()
+
+
+# ---------------------------------------------------------------- Jenkins
+
+def job_json(server, name):
+    last = server.config.builds_per_job
+    return {
+        "_class": "hudson.model.FreeStyleProject",
+        "name": name,
+        "fullName": name,
+        "url": f"{server.url}/job/{name}/",
+        "color": "blue" if hash(name) % 4 else "red",
+        "buildable": True,
+        "description": f"Nightly robot run for {name}",
+        "healthReport": [{
+            "description": "Build stability: 2 out of the last 5 builds failed.",
+            "iconUrl": "health-40to59.png",
+            "score": 60,
+        }],
+        "lastBuild": {"_class": "hudson.model.FreeStyleBuild", "number": last, "url": f"{server.url}/job/{name}/{last}/"},
+        "lastCompletedBuild": {"number": last, "url": f"{server.url}/job/{name}/{last}/"},
+        "builds": [{"number": number, "url": f"{server.url}/job/{name}/{number}/"} for number in range(last, 0, -1)],
+        "allBuilds": [
+            {key: build_json(server, name, number)[key] for key in ("number", "result", "duration", "timestamp")}
+            for number in range(last, 0, -1)
+        ],
+        "nextBuildNumber": last + 1,
+        "property": [],
+        "queueItem": None,
+    }
+
+
+def build_json(server, name, number):
+    return {
+        "_class": "hudson.model.FreeStyleBuild",
+        "number": number,
+        "url": f"{server.url}/job/{name}/{number}/",
+        "building": False,
+        "result": "SUCCESS" if number % 3 else "FAILURE",
+        "duration": 3_600_000 + number * 1000,
+        "timestamp": 1_650_000_000_000 + number * 86_400_000,
+        "artifacts": [
+            {"fileName": "archive.zip", "relativePath": "output/archive.zip", "displayPath": "archive.zip"},
+            {"fileName": "output.xml", "relativePath": "output/output.xml", "displayPath": "output.xml"},
+        ],
+    }
+
+
+def jenkins_routes():
+    def whoami(server, match, query):
+        return as_json({"fullName": "Bench User", "id": "bench", "property": [{"address": "bench@example.com"}]})
+
+    def view(server, match, query):
+        jobs = [job_json(server, f"job_{index}") for index in range(server.config.jobs_per_view)]
+        return as_json({"name": match['view'], "jobs": jobs})
+
+    def job(server, match, query):
+        return as_json(job_json(server, match['job']))
+
+    def build(server, match, query):
+        return as_json(build_json(server, match['job'], int(match['number'])))
+
+    def console_text(server):
+        # Upstream consoles name the downstream build they triggered, PullBuildArtifactsAndRobotReports parses it
+        trigger = b"Triggering a new build of ACCx_RTA-DWH_NIGHTLY #1031\n"
+        line = b"[INFO] Robot keyword finished in 0.123s, continuing with the next step of the suite\n"
+        return trigger + line * (server.config.console_kb * 1024 // len(line))
+
+    def console(server, match, query):
+        return 200, {'Content-Type': 'text/plain'}, console_text(server)
+
+    def progressive_console(server, match, query):
+        text = console_text(server)
+        start = int(parse_qs(query).get('start', ['0'])[0])
+        headers = {'Content-Type': 'text/plain', 'X-Text-Size': str(len(text)), 'X-More-Data': 'false'}
+        return 200, headers, text[start:]
+
+    def robot_file(server, match, query):
+        return 200, {'Content-Type': 'text/html'}, ROBOT_OUTPUT.read_bytes()
+
+    def archive(server, match, query):
+        return 200, {'Content-Type': 'application/zip'}, _archive(server.config.artifact_kb)
+
+    def trigger(server, match, query):
+        return 201, {'Location': f"{server.url}/queue/item/{int(time.time()) % 100000}/"}, b""
+
+    def queue_item(server, match, query):
+        return as_json({"id": int(match['id']), "executable": {"number": 31, "url": f"{server.url}/job/x/31/"}})
+
+    def created(server, match, query):
+        return 200, {}, b""
+
+    return [
+        ('GET', r'.*/me/api/json', whoami),
+        ('GET', r'.*/crumbIssuer/api/json', lambda server, match, query: (404, {}, b"")),
+        ('GET', r'.*/view/(?P<view>[^/]+)/api/json', view),
+        ('GET', r'.*/job/(?P<job>[^/]+)/api/json', job),
+        ('GET', r'.*/job/(?P<job>[^/]+)/(?P<number>\d+)/api/json', build),
+        ('GET', r'.*/job/(?P<job>[^/]+)/(?P<number>\d+)/consoleText', console),
+        ('GET', r'.*/job/(?P<job>[^/]+)/(?P<number>\d+)/logText/progressiveText', progressive_console),
+        ('GET', r'.*/job/(?P<job>[^/]+)/(?P<number>\d+)/robot/report/.*', robot_file),
+        ('GET', r'.*/job/(?P<job>[^/]+)/(?P<number>\d+)/artifact/.*', archive),
+        ('POST', r'.*/job/(?P<job>[^/]+)/build(WithParameters)?', trigger),
+        ('GET', r'.*/queue/item/(?P<id>\d+)/api/json', queue_item),
+        ('POST', r'.*/createItem', created),
+    ]
+
+
+_archives = {}
+
+
+def _archive(size_kb):
+    if size_kb not in _archives:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+            archive.writestr("output/output.xml", ROBOT_OUTPUT.read_bytes())
+            archive.writestr("output/padding.bin", os.urandom(size_kb * 1024))
+        _archives[size_kb] = buffer.getvalue()
+    return _archives[size_kb]
+
+
+# ---------------------------------------------------------------- Jira
+
+def jira_routes():
+    def issue(server, match, query):
+        return as_json({
+            "id": "10001",
+            "key": match['key'],
+            "fields": {
+                "summary": "Fix nightly TC results",
+                "issuetype": {"name": "Story", "id": "10"},
+                "status": {"name": "Open"},
+                "labels": ["Leprechauns", "RobotTests"],
+                "description": "x" * 2048,
+                "comment": {"comments": [{"id": str(index), "body": "y" * 256} for index in range(20)]},
+            },
+        })
+
+    def create(server, match, query):
+        return as_json({"id": "10002", "key": "IOTA-1234", "self": f"{server.url}/rest/api/2/issue/10002"}, 201)
+
+    def comment(server, match, query):
+        return as_json({"id": "1", "body": "ok"}, 201)
+
+    def worklog(server, match, query):
+        return as_json({"id": "1", "timeSpent": "1h"}, 201)
+
+    return [
+        ('GET', r'.*/rest/api/2/issue/(?P<key>[^/]+)', issue),
+        ('POST', r'.*/rest/api/2/issue/?', create),
+        ('POST', r'.*/rest/api/2/issue/+(?P<key>[^/]+)/comment', comment),
+        ('POST', r'.*rest/api/2/issue/(?P<key>[^/]+)/worklog', worklog),
+    ]
+
+
+# ---------------------------------------------------------------- Gerrit
+
+def gerrit_routes():
+    def suggest(server, match, query):
+        return as_json([
+            {"account": {"_account_id": index, "name": f"User {index}", "email": f"user{index}@example.com",
+                         "username": f"user{index}"}, "count": 1}
+            for index in range(10)
+        ], prefix=GERRIT_MAGIC_PREFIX)
+
+    def change(server, match, query):
+        return as_json({"id": match['change'], "project": "dcp_tests", "branch": "master", "status": "NEW"},
+                       prefix=GERRIT_MAGIC_PREFIX)
+
+    def topic(server, match, query):
+        return as_json("topic", prefix=GERRIT_MAGIC_PREFIX)
+
+    def reviewer(server, match, query):
+        return as_json({"input": "user", "reviewers": []}, prefix=GERRIT_MAGIC_PREFIX)
+
+    return [
+        ('GET', r'/a/changes/(?P<change>[^/]+)/suggest_reviewers', suggest),
+        ('GET', r'/a/changes/(?P<change>[^/]+)/?', change),
+        ('PUT', r'/a/changes/(?P<change>[^/]+)/topic', topic),
+        ('POST', r'/a/changes/(?P<change>[^/]+)/reviewers', reviewer),
+    ]
+
+
+# ---------------------------------------------------------------- Elasticsearch
+
+def elastic_routes():
+    def root(server, match, query):
+        return as_json({"name": "node-1", "cluster_name": "bench", "version": {"number": "7.17.0"}})
+
+    def health(server, match, query):
+        return as_json({"cluster_name": "bench", "status": "green", "number_of_nodes": 3, "active_shards": 120})
+
+    def state(server, match, query):
+        indices = {f"index-{index}": {"state": "open", "settings": {"index": {"number_of_shards": "3"}},
+                                      "mappings": {"properties": {f"field_{f}": {"type": "keyword"}
+                                                                  for f in range(50)}}}
+                   for index in range(200)}
+        return as_json({"cluster_name": "bench", "version": 42, "metadata": {"indices": indices},
+                        "nodes": {f"node-{index}": {"name": f"node-{index}"} for index in range(3)}})
+
+    def stats(server, match, query):
+        return as_json({"cluster_name": "bench", "indices": {"count": 200, "docs": {"count": 10_000_000}},
+                        "nodes": {"count": {"total": 3}}})
+
+    def cat_tasks(server, match, query):
+        line = "indices:data/read/search  node-1  transport 1650000000000 10:00:00 1.2ms  10.0.0.1 node-1\n"
+        return 200, {'Content-Type': 'text/plain'}, (line * 200).encode()
+
+    def index(server, match, query):
+        return as_json({match['index']: {"aliases": {}, "mappings": {}, "settings": {"index": {"uuid": "abc"}}}})
+
+    return [
+        ('GET', r'/', root),
+        ('HEAD', r'/', root),
+        ('GET', r'/_cluster/health', health),
+        ('GET', r'/_cluster/state(/.*)?', state),
+        ('GET', r'/_cluster/stats', stats),
+        ('GET', r'/_cat/tasks', cat_tasks),
+        ('GET', r'/(?P<index>[^_/][^/]*)', index),
+    ]
+
+
+def start_all(config=None):
+    """Starts one stub per service, returns {service: StubServer}"""
+    config = config or StubConfig()
+    return {
+        "jenkins": StubServer("jenkins", jenkins_routes(), config).start(),
+        "jira": StubServer("jira", jira_routes(), config).start(),
+        "gerrit": StubServer("gerrit", gerrit_routes(), config).start(),
+        "elasticsearch": StubServer("elasticsearch", elastic_routes(), config).start(),
+    }
+
+
+def tool_environment(servers):
+    """Environment variables pointing the tools at the stubs"""
+    return {
+        "jenkins_url": servers["jenkins"].url + "/jenkins",
+        "jira_url": servers["jira"].url,
+        "gerrit_url": servers["gerrit"].url,
+        "elasticsearch_url": servers["elasticsearch"].url,
+        "jenkins_script_user": "bench", "jenkins_script_token": "bench",
+        "jira_script_user": "bench", "jira_script_token": "bench",
+        "gerrit_script_user": "bench", "gerrit_script_token": "bench",
+        "KARAF_CLIENT": "true",
+        "BROWSER": "true",
+    }
@@ -1,24 +1,29 @@
 import argparse
-import inspect
-from pprint import pprint
+import json
+import sys
 
 from strategies.StrategyExecutor import Executor
-import strategies.strategies as Strategies
+from strategies.cache import ResultCache
+from strategies.output import FORMATS, write_result
+from strategies.manifest import load_manifest
 
 
 class ArgParser:
     @staticmethod
-    def classes_in_module(module):
+    def strategies_help(manifest):
         """
-        Returns a list of classes in a module. Classes are returned as a list of tuples.
-        Each tuple contains the class name, the class docstring, and the class parameters expected.
-        md = module
-        c = class
-        s = strategy
+        Returns the help text for every strategy in the manifest.
+        Each entry holds the strategy name, the class docstring, and the class parameters expected.
         """
-        md = module.__dict__
-        all_strategy_obj = [md[c] for c in md if (isinstance(md[c], type) and md[c].__module__ == module.__name__)]
-        return [(s.__name__, s.__doc__, [k for k in inspect.signature(s).parameters.keys()]) for s in all_strategy_obj]
+        return "\n".join(
+            [
+                f"Strategy: {strategy['name']}\n\t"
+                f"Info: {strategy['doc']}\n\t"
+                f"Params: {strategy['params']}\n" for strategy in manifest
+            ]
+        )
+
+    manifest = load_manifest()
 
     parser = argparse.ArgumentParser(
         formatter_class=argparse.RawTextHelpFormatter,
@@ -27,31 +32,146 @@ class ArgParser:
 
         This tool will execute a strategy.
         Possible Strategies are:\n
-""" + "\n".join(
-            [
-                f"Strategy: {strategy[0]}\n\t"
-                f"Info: {strategy[1]}\n\t"
-                f"Params: {strategy[2]}\n" for strategy in classes_in_module(Strategies)
-            ]
-        )
+""" + strategies_help(manifest)
     )
 
     parser.add_argument(
         "strategy",
         help="strategy to perform",
-        nargs='+',
+        nargs='*',
+    )
+    parser.add_argument(
+        "--format",
+        help="output format, ndjson/json/csv stream results as they are produced (default: pprint)",
+        choices=FORMATS,
+        default="pprint",
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="do not read or write the result cache of strategies with a cache_ttl",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--refresh",
+        help="ignore cached results, run the strategy and cache the fresh result",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--profile",
+        help="record a span per outbound call and bootstrap phase, written as a Chrome trace to PROFILE",
+        nargs='?',
+        const="strategy_profile.json",
+        metavar="PROFILE",
+    )
+    parser.add_argument(
+        "--profile-top",
+        help="number of slowest endpoints in the --profile summary (default: 10)",
+        type=int,
+        default=10,
+    )
+    parser.add_argument(
+        "--plan",
+        help="JSON/YAML plan file of many strategies to run concurrently, one JSON result line each",
+    )
+    parser.add_argument(
+        "--workers",
+        help="number of strategies a --plan runs at once (default: plan max_workers, or 8)",
+        type=int,
+    )
+    parser.add_argument(
+        "--serve",
+        help="start a strategy daemon that keeps tool sessions warm",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--daemon",
+        help="run the strategy in the strategy daemon started with --serve",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--socket",
+        help="unix socket of the strategy daemon (default: $XDG_RUNTIME_DIR/strategy_tool-<uid>.sock)",
+    )
+    parser.add_argument(
+        "--idle",
+        help="seconds before the daemon drops an unused tool session (default: 900)",
+        type=int,
     )
 
 
 class Main:
-    def __init__(self, strategy_name, strategy_args):
+    def __init__(self, strategy_name, strategy_args, use_cache=True, refresh=False, output_format='pprint'):
+        if use_cache and ResultCache.cacheable(strategy_name):
+            result = ResultCache().execute(
+                strategy_name, strategy_args, lambda: self.run(strategy_name, strategy_args), refresh=refresh
+            )
+        else:
+            result = self.run(strategy_name, strategy_args)
+        write_result(result, output_format)
+
+    def run(self, strategy_name, strategy_args):
         self.executor = Executor(strategy_name(*strategy_args))
-        pprint(self.executor.execute_strategy())
+        return self.executor.execute_strategy()
+
+
+class BatchMain:
+    def __init__(self, plan, max_workers=None, use_cache=True, refresh=False):
+        from strategies.batch import BatchRunner
+        cache = ResultCache() if use_cache else None
+        self.runner = BatchRunner.from_plan(plan, max_workers=max_workers, cache=cache, refresh=refresh)
+        for result in self.runner.run():
+            print(json.dumps(result, default=str), flush=True)
+
+
+class DaemonMain:
+    def __init__(self, strategy_name, strategy_args, socket_path=None, output_format='pprint', use_cache=True,
+                 refresh=False):
+        from strategies.daemon import request
+        reply = request(strategy_name, strategy_args, socket_path, use_cache, refresh)
+        if 'error' in reply:
+            raise SystemExit(reply['error'])
+        write_result(reply['result'], output_format)
 
 
 if __name__ == '__main__':
     parser = ArgParser.parser
     args = parser.parse_args()
+    if args.serve:
+        from strategies.daemon import StrategyDaemon, DEFAULT_IDLE_SECONDS
+        try:
+            daemon = StrategyDaemon(args.socket, args.idle or DEFAULT_IDLE_SECONDS)
+        except FileExistsError as error:
+            parser.error(str(error))
+        daemon.serve()
+        parser.exit()
+    if args.plan:
+        if args.strategy:
+            parser.error("Give either a strategy or --plan, not both")
+        BatchMain(args.plan, args.workers, use_cache=not args.no_cache, refresh=args.refresh)
+        parser.exit()
+    if not args.strategy:
+        parser.error("A strategy, or --plan, is required")
     strategy_to_execute = args.strategy.pop(0)
+    if strategy_to_execute not in [strategy['name'] for strategy in ArgParser.manifest]:
+        parser.error(f"Unknown strategy: {strategy_to_execute}")
+    if args.daemon:
+        DaemonMain(strategy_to_execute, args.strategy, args.socket, args.format, use_cache=not args.no_cache,
+                   refresh=args.refresh)
+        parser.exit()
+    # Only the strategy module is imported here, tool modules load when the strategy first uses them
+    import strategies.strategies as Strategies
     strategy_class = getattr(Strategies, strategy_to_execute)
-    main = Main(strategy_class, args.strategy)
+    if args.profile:
+        from strategies.profiler import Profiler
+        profiler = Profiler().start()
+        try:
+            with profiler.strategy(strategy_to_execute):
+                main = Main(strategy_class, args.strategy, use_cache=not args.no_cache, refresh=args.refresh,
+                            output_format=args.format)
+        finally:
+            profiler.stop()
+            profiler.write_chrome_trace(args.profile)
+            print(f"--(( Profile written to {args.profile} ))\n{profiler.summary(args.profile_top)}", file=sys.stderr)
+    else:
+        main = Main(strategy_class, args.strategy, use_cache=not args.no_cache, refresh=args.refresh,
+                    output_format=args.format)
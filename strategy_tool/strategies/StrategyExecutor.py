@@ -1,13 +1,24 @@
 from __future__ import annotations
+import asyncio
+import inspect
 import os
+import threading
+import time
 import types
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from importlib.machinery import SourceFileLoader
 from pathlib import Path
 from sys import exit
 
 
 from ..console_parser import ConsoleParser
+from .profiler import phase
+
+TOOLS_ROOT = Path(os.path.dirname(__file__)).parent.parent
+# Upper bound on blocking tool calls running at once for async strategies
+BLOCKING_WORKERS = int(os.environ.get('dev_tools_blocking_workers', 16))
 
 
 def load_module_from_file(name, path):
@@ -21,6 +32,85 @@ def load_module_from_file(name, path):
         return None, error
 
 
+@lru_cache(maxsize=None)
+def blocking_pool():
+    """Process wide thread pool that async strategies use for blocking tool calls"""
+    return ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="blocking")
+
+
+@lru_cache(maxsize=None)
+def load_tool_module(name):
+    """Loads <name>/<name>.py from the dev_tools root, once per process"""
+    module, error = load_module_from_file(name, TOOLS_ROOT / name / f"{name}.py")
+    if error:
+        raise error
+    return module
+
+
+class Tool:
+    """Strategy attribute that builds a tool client the first time it is touched.
+
+    The client is memoized in the strategy's Tools, so strategies sharing a Tools never build it twice.
+    Tools are handed the process wide session registry so they share pooled connections.
+    """
+
+    def __init__(self, module_name, class_name):
+        self.module_name = module_name
+        self.class_name = class_name
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, strategy, owner=None):
+        if strategy is None:
+            return self
+        return strategy.tools.get(self)
+
+    def build(self):
+        with phase(f"load {self.module_name}"):
+            tool_class = getattr(load_tool_module(self.module_name), self.class_name)
+            sessions = load_tool_module("session_tool").registry
+        with phase(f"build {self.class_name}"):
+            return tool_class(sessions=sessions)
+
+
+class Tools:
+    """Holds the tool clients built so far. Thread safe, one client per Tool."""
+
+    def __init__(self):
+        self._built = {}
+        self._last_used = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self._built
+
+    def get(self, tool: Tool):
+        self._last_used[tool.name] = time.monotonic()
+        try:
+            return self._built[tool.name]
+        except KeyError:
+            pass
+        with self._lock:
+            if tool.name not in self._built:
+                self._built[tool.name] = tool.build()
+            return self._built[tool.name]
+
+    def evict_idle(self, idle_seconds):
+        """Drops clients not used for idle_seconds, they are rebuilt on next use
+
+        :return: names of the evicted clients
+        :rtype: list(str)
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = [name for name in self._built if now - self._last_used.get(name, 0) > idle_seconds]
+            for name in idle:
+                del self._built[name]
+        return idle
+
+
 class Executor:
 
     def __init__(self, strategy: Strategy) -> None:
@@ -35,30 +125,49 @@ class Executor:
         self._strategy = strategy
 
     def execute_strategy(self):
+        if inspect.iscoroutinefunction(self._strategy.execute):
+            return asyncio.run(self._strategy.execute())
         return self._strategy.execute()
 
 
+class AsyncExecutor(Executor):
+    """Executor for use inside an event loop, sync strategies run in the blocking pool"""
+
+    async def execute_strategy(self):
+        if inspect.iscoroutinefunction(self._strategy.execute):
+            return await self._strategy.execute()
+        return await self._strategy.run_blocking(self._strategy.execute)
+
+
 class Strategy(ABC):
+    # Seconds a result may be served from the result cache, 0 disables caching.
+    # Keep it 0 for strategies that change anything (builds, tickets, reviews, files)
+    cache_ttl = 0
+
+    jenkins_tool = Tool("jenkins_tool", "JenkinsTool")
+    jira_tool = Tool("jira_tool", "JiraTool")
+    gerrit_tool = Tool("gerrit_tool", "GerritTool")
+    elastic_tool = Tool("elastic_tool", "EsTool")
+    karaf_tool = Tool("karaf_tool", "KarafTool")
 
     def __init__(self):
 
         self.console_parser = ConsoleParser()
         self.script_dir = Path(os.path.dirname(__file__))
         self.output_dir = Path("../../jenkins_tool/output")
-        self.robot_log_name = Path("log_all.html")
-        self.robot_report_name = Path("report_all.html")
-        self.jenkins = load_module_from_file("jenkins_tool", self.script_dir.parent.parent / "jenkins_tool/jenkins_tool.py")[0]
-        self.jira = load_module_from_file("jira_tool",  self.script_dir.parent.parent / "jira_tool/jira_tool.py")[0]
-        self.gerrit = load_module_from_file("gerrit_tool",  self.script_dir.parent.parent / "gerrit_tool/gerrit_tool.py")[0]
-        self.elastic = load_module_from_file("elastic_tool",  self.script_dir.parent.parent / "elastic_tool/elastic_tool.py")[0]
-        self.karaf = load_module_from_file("karaf_tool",  self.script_dir.parent.parent / "karaf_tool/karaf_tool.py")[0]
-
-        self.jenkins_tool = self.jenkins.JenkinsTool()
-        self.jira_tool = self.jira.JiraTool()
-        self.gerrit_tool = self.gerrit.GerritTool()
-
-        self.elastic_tool = self.elastic.EsTool()
-        self.karaf_tool = self.karaf.KarafTool()
+        self.tools = Tools()
+
+    @staticmethod
+    async def run_blocking(function, *args, **kwargs):
+        """Awaits a blocking tool call in the bounded blocking pool, so many calls can be gathered at once"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(blocking_pool(), partial(function, *args, **kwargs))
+
+    def sub_strategy(self, strategy_class, *args):
+        """Build another strategy that shares this strategy's tool clients"""
+        strategy = strategy_class(*args)
+        strategy.tools = self.tools
+        return strategy
 
     @classmethod
     def handler(cls, signal_received, frame):
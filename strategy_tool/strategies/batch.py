@@ -0,0 +1,127 @@
+"""
+Runs many strategy invocations from one plan file, in one process, sharing tool clients and HTTP sessions.
+
+A plan is JSON, or YAML if PyYAML is installed:
+
+    {
+        "max_workers": 8,
+        "limits": {"jenkins_tool": 4, "elastic_tool": 2},
+        "runs": [
+            {"strategy": "JobInfo", "each": ["job_a", "job_b"]},
+            {"strategy": "ElasticIndexInfo", "args": ["my_index"]}
+        ]
+    }
+
+"args" runs the strategy once, "each" runs it once per entry (an entry is a value or a list of args).
+"limits" caps how many strategies may use a tool client at the same time.
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from .StrategyExecutor import Executor, Tools
+from .manifest import load_manifest
+from .output import materialize
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def read_plan(path):
+    """Loads a plan file, YAML is picked by the .yml/.yaml extension
+
+    :param str path: plan file path
+    :rtype: dict
+    """
+    path = Path(path)
+    with open(path) as plan_file:
+        if path.suffix.lower() in ('.yml', '.yaml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("YAML plans need PyYAML: pip install pyyaml")
+            return yaml.safe_load(plan_file)
+        return json.load(plan_file)
+
+
+def expand_runs(plan):
+    """Flattens the plan runs into a list of (strategy_name, args)"""
+    runs = []
+    for run in plan['runs']:
+        if 'each' in run:
+            for args in run['each']:
+                runs.append((run['strategy'], list(args) if isinstance(args, (list, tuple)) else [args]))
+        else:
+            runs.append((run['strategy'], list(run.get('args', []))))
+    return runs
+
+
+class BatchRunner:
+    """Executes (strategy_name, args) invocations on a bounded thread pool.
+
+    Every strategy shares one Tools, so each tool client is built once for the whole batch.
+    Results are yielded as soon as each strategy finishes, not in plan order.
+    """
+
+    def __init__(self, runs, max_workers=DEFAULT_MAX_WORKERS, limits=None, cache=None, refresh=False):
+        """
+        :param ResultCache cache: serve and store the results of strategies with a cache_ttl, None disables it
+        :param bool refresh: run every strategy, but still store fresh results in cache
+        """
+        self.runs = runs
+        self.cache = cache
+        self.refresh = refresh
+        self.max_workers = max_workers
+        self.limits = {name: threading.BoundedSemaphore(int(limit)) for name, limit in (limits or {}).items()}
+        self.tools = Tools()
+        self.strategy_tools = {strategy['name']: strategy['tools'] for strategy in load_manifest()}
+
+    @classmethod
+    def from_plan(cls, path, max_workers=None, cache=None, refresh=False):
+        plan = read_plan(path)
+        return cls(
+            expand_runs(plan),
+            max_workers=max_workers or plan.get('max_workers', DEFAULT_MAX_WORKERS),
+            limits=plan.get('limits'),
+            cache=cache,
+            refresh=refresh,
+        )
+
+    def _execute(self, index, strategy_name, args):
+        from . import strategies as Strategies
+
+        result = {"index": index, "strategy": strategy_name, "args": args}
+        # Acquire in a fixed order so two strategies can never wait on each other
+        semaphores = [self.limits[name] for name in sorted(self.strategy_tools.get(strategy_name, []))
+                      if name in self.limits]
+        for semaphore in semaphores:
+            semaphore.acquire()
+        start = time.perf_counter()
+        try:
+            strategy_class = getattr(Strategies, strategy_name)
+            result["result"] = self._run(strategy_class, args)
+        except Exception as error:
+            result["error"] = f"{type(error).__name__}: {error}"
+        finally:
+            for semaphore in reversed(semaphores):
+                semaphore.release()
+        result["seconds"] = round(time.perf_counter() - start, 3)
+        return result
+
+    def _run(self, strategy_class, args):
+        def execute():
+            strategy = strategy_class(*args)
+            strategy.tools = self.tools
+            return materialize(Executor(strategy).execute_strategy())
+
+        if self.cache is None:
+            return execute()
+        return self.cache.execute(strategy_class, args, execute, refresh=self.refresh)
+
+    def run(self):
+        """Yields one dict per invocation: index, strategy, args, result or error, seconds"""
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="strategy") as pool:
+            futures = [pool.submit(self._execute, index, name, args) for index, (name, args) in enumerate(self.runs)]
+            for future in as_completed(futures):
+                yield future.result()
@@ -0,0 +1,96 @@
+"""
+On disk cache of strategy results, for read only strategies that set cache_ttl.
+
+Entries are keyed by strategy class and args, expire after the strategy's cache_ttl seconds and are evicted
+least recently used first once the cache grows past max_bytes. Writes go to a temp file that is renamed into
+place, so concurrent runs never read a half written entry.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+
+CACHE_DIR = Path(os.environ.get('dev_tools_cache_dir', Path.home() / ".cache" / "strategy_tool"))
+MAX_BYTES = int(os.environ.get('dev_tools_cache_max_bytes', 64 * 1024 * 1024))
+
+
+class ResultCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def cacheable(strategy_class):
+        """Only strategies that opt in with a cache_ttl are cached"""
+        return strategy_class.cache_ttl > 0
+
+    def path(self, strategy_class, args):
+        key = repr((strategy_class.__module__, strategy_class.__qualname__, [str(arg) for arg in args]))
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.pickle"
+
+    def get(self, strategy_class, args):
+        """Returns (True, result) for a fresh entry, (False, None) otherwise"""
+        path = self.path(strategy_class, args)
+        try:
+            with open(path, 'rb') as entry:
+                stored_at, result = pickle.load(entry)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+        if time.time() - stored_at > strategy_class.cache_ttl:
+            return False, None
+        try:
+            # mtime doubles as the last used time for LRU eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return True, result
+
+    def put(self, strategy_class, args, result):
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        try:
+            payload = pickle.dumps((time.time(), result), protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as entry:
+                entry.write(payload)
+            os.replace(tmp_path, self.path(strategy_class, args))
+        except OSError:
+            Path(tmp_path).unlink(missing_ok=True)
+            return
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for path in self.directory.glob("*.pickle"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def execute(self, strategy_class, args, execute, refresh=False):
+        """Returns the cached result of strategy_class(*args), calling execute() on a miss
+
+        :param callable execute: runs the strategy and returns its result
+        :param bool refresh: ignore any cached entry, but store the new result
+        """
+        if not self.cacheable(strategy_class):
+            return execute()
+        if not refresh:
+            hit, result = self.get(strategy_class, args)
+            if hit:
+                return result
+        result = execute()
+        self.put(strategy_class, args, result)
+        return result
@@ -0,0 +1,125 @@
+"""
+Long running strategy server that keeps tool clients warm between invocations.
+
+Start it once:
+    python main.py --serve
+then run strategies through it:
+    python main.py --daemon JobInfo my_job
+
+Each connection sends one JSON line, {"strategy": name, "args": [...], "cache": true, "refresh": false}, and
+receives one JSON line back, {"result": ...} or {"error": ...}. Results of strategies with a cache_ttl go through
+the result cache unless cache is false, refresh runs the strategy even when a cached result is fresh. Clients idle for longer than idle_seconds are dropped and rebuilt on next use.
+"""
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+from pathlib import Path
+
+from .StrategyExecutor import Executor, Tools
+from .cache import ResultCache
+from .output import materialize
+
+DEFAULT_IDLE_SECONDS = 15 * 60
+
+
+def default_socket_path():
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR', tempfile.gettempdir())
+    return Path(runtime_dir) / f"strategy_tool-{os.getuid()}.sock"
+
+
+class StrategyRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        from . import strategies as Strategies
+
+        try:
+            request = json.loads(self.rfile.readline())
+            strategy_class = getattr(Strategies, request['strategy'])
+            args = request.get('args', [])
+
+            def execute():
+                strategy = strategy_class(*args)
+                strategy.tools = self.server.tools
+                return materialize(Executor(strategy).execute_strategy())
+
+            if request.get('cache', True):
+                result = self.server.cache.execute(strategy_class, args, execute, refresh=request.get('refresh', False))
+            else:
+                result = execute()
+            reply = {"result": result}
+        except Exception as error:
+            reply = {"error": f"{type(error).__name__}: {error}"}
+        self.wfile.write(json.dumps(reply, default=str).encode() + b"\n")
+
+
+class StrategyDaemon(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path=None, idle_seconds=DEFAULT_IDLE_SECONDS):
+        self.socket_path = Path(socket_path or default_socket_path())
+        self.idle_seconds = idle_seconds
+        self.tools = Tools()
+        self.cache = ResultCache()
+        self._stop = threading.Event()
+        self._remove_stale_socket()
+        super().__init__(str(self.socket_path), StrategyRequestHandler)
+
+    def _remove_stale_socket(self):
+        """Removes a socket file left by a daemon that is gone, refuses to replace a live one
+
+        :raises: FileExistsError when a daemon is still listening on socket_path
+        """
+        if not self.socket_path.exists():
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(str(self.socket_path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                self.socket_path.unlink(missing_ok=True)
+                return
+        raise FileExistsError(f"A strategy daemon is already listening on {self.socket_path}")
+
+    def server_bind(self):
+        # Strategies run with the owner's credentials, so the socket must never be reachable by other users,
+        # not even between bind() and a later chmod()
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+
+    def _evict_idle_loop(self):
+        while not self._stop.wait(min(60, self.idle_seconds)):
+            for name in self.tools.evict_idle(self.idle_seconds):
+                print(f"--(( Evicted idle {name} ))", flush=True)
+
+    def serve(self):
+        print(f"--(( Strategy daemon listening on {self.socket_path} ))", flush=True)
+        threading.Thread(target=self._evict_idle_loop, name="evict-idle", daemon=True).start()
+        try:
+            self.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            self.server_close()
+            self.socket_path.unlink(missing_ok=True)
+
+
+def request(strategy_name, args, socket_path=None, use_cache=True, refresh=False):
+    """Runs a strategy in the daemon and returns its reply dict
+
+    :raises: ConnectionError when no daemon is listening on socket_path
+    """
+    socket_path = str(socket_path or default_socket_path())
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            raise ConnectionError(f"No strategy daemon listening on {socket_path}, start one with --serve")
+        message = {"strategy": strategy_name, "args": args, "cache": use_cache, "refresh": refresh}
+        client.sendall(json.dumps(message).encode() + b"\n")
+        with client.makefile('rb') as reply:
+            return json.loads(reply.readline())
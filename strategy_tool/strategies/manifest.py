@@ -0,0 +1,88 @@
+"""
+Strategy catalogue used by the CLI help and argument checks.
+
+The catalogue is read from strategies.py with ast, so no strategy or tool module is imported to print help.
+It is cached next to this file and rebuilt whenever strategies.py changes.
+"""
+import ast
+import json
+import os
+from pathlib import Path
+
+STRATEGIES_SOURCE = Path(os.path.dirname(__file__)) / "strategies.py"
+MANIFEST_PATH = Path(os.path.dirname(__file__)) / ".strategy_manifest.json"
+# Bump when the shape of a manifest entry changes
+MANIFEST_VERSION = 2
+
+
+def _init_params(class_node, classes):
+    """Parameter names of a class __init__, following bases defined in the same module"""
+    for node in class_node.body:
+        if isinstance(node, ast.FunctionDef) and node.name == '__init__':
+            args = node.args
+            names = [a.arg for a in args.posonlyargs + args.args][1:]
+            if args.vararg:
+                names.append(args.vararg.arg)
+            names += [a.arg for a in args.kwonlyargs]
+            if args.kwarg:
+                names.append(args.kwarg.arg)
+            return names
+    for base in class_node.bases:
+        if isinstance(base, ast.Name) and base.id in classes:
+            return _init_params(classes[base.id], classes)
+    return []
+
+
+def _tools_used(class_node, classes):
+    """Names of the self.<name>_tool clients a class, its same-module bases or its sub strategies touch"""
+    tools = set()
+    for node in ast.walk(class_node):
+        if isinstance(node, ast.Attribute) and node.attr.endswith('_tool') \
+                and isinstance(node.value, ast.Name) and node.value.id == 'self':
+            tools.add(node.attr)
+        elif isinstance(node, ast.Name) and node.id in classes and node.id != class_node.name:
+            tools |= _tools_used(classes[node.id], {k: v for k, v in classes.items() if k != class_node.name})
+    return tools
+
+
+def build_manifest(source=STRATEGIES_SOURCE):
+    """Returns [{name, doc, params, tools}] for every class defined in source
+
+    :param Path source: strategies module source file
+    :rtype: list(dict)
+    """
+    tree = ast.parse(Path(source).read_text(), filename=str(source))
+    classes = {node.name: node for node in tree.body if isinstance(node, ast.ClassDef)}
+    return [
+        {
+            "name": name,
+            "doc": ast.get_docstring(node, clean=False),
+            "params": _init_params(node, classes),
+            "tools": sorted(_tools_used(node, classes)),
+        }
+        for name, node in classes.items()
+    ]
+
+
+def load_manifest(source=STRATEGIES_SOURCE, manifest_path=MANIFEST_PATH):
+    """Returns the cached strategy catalogue, rebuilding it if source has changed since it was written"""
+    stat = os.stat(source)
+    stamp = [MANIFEST_VERSION, stat.st_mtime_ns, stat.st_size]
+    try:
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest["source_stamp"] == stamp:
+            return manifest["strategies"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    strategies = build_manifest(source)
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as manifest_file:
+            json.dump({"source_stamp": stamp, "strategies": strategies}, manifest_file)
+        os.replace(tmp_path, manifest_path)
+    except OSError:
+        # Read only install, the catalogue is still usable, just not cached
+        pass
+    return strategies
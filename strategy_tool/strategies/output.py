@@ -0,0 +1,81 @@
+"""
+Writers for strategy results, used by main.py --format.
+
+Strategies may return a generator, or any other iterator. ndjson, json and csv write each item as soon as it is
+produced and flush, so large results are never held in memory and downstream tools (jq, ...) can start right away.
+Lists are written item by item the same way, any other result is written as a single document.
+"""
+import csv
+import json
+from collections.abc import Iterator
+import sys
+from pprint import pprint
+
+FORMATS = ('pprint', 'ndjson', 'json', 'csv')
+
+
+def is_stream(result):
+    return isinstance(result, (Iterator, list, tuple))
+
+
+def materialize(result):
+    """Turns an iterator result into a list, for callers that need the whole result (cache, daemon, batch)"""
+    return list(result) if isinstance(result, Iterator) else result
+
+
+def _dumps(item):
+    return json.dumps(item, default=str)
+
+
+def write_pprint(result, stream):
+    pprint(materialize(result), stream=stream)
+
+
+def write_ndjson(result, stream):
+    for item in (result if is_stream(result) else [result]):
+        stream.write(_dumps(item) + "\n")
+        stream.flush()
+
+
+def write_json(result, stream):
+    if not is_stream(result):
+        stream.write(_dumps(result) + "\n")
+        return
+    stream.write("[")
+    for index, item in enumerate(result):
+        stream.write(("," if index else "") + "\n" + _dumps(item))
+        stream.flush()
+    stream.write("\n]\n")
+
+
+def _csv_row(item):
+    return item if isinstance(item, dict) else {"value": item}
+
+
+def write_csv(result, stream):
+    """Columns are every key of a list result. An iterator is written as it is produced, so its columns come from
+    the first row and a later row with another column raises a ValueError instead of losing it"""
+    rows = result if is_stream(result) else [result]
+    fieldnames = None
+    if isinstance(rows, (list, tuple)):
+        fieldnames = list(dict.fromkeys(key for item in rows for key in _csv_row(item)))
+    writer = None
+    for item in rows:
+        row = _csv_row(item)
+        if writer is None:
+            writer = csv.DictWriter(stream, fieldnames=fieldnames or list(row), restval='')
+            writer.writeheader()
+        unknown = [key for key in row if key not in writer.fieldnames]
+        if unknown:
+            raise ValueError(f"CSV row has columns {unknown} missing from the header {writer.fieldnames}, "
+                             f"use --format ndjson for results whose rows differ")
+        writer.writerow({key: value if isinstance(value, (str, int, float)) or value is None else _dumps(value)
+                         for key, value in row.items()})
+        stream.flush()
+
+
+WRITERS = {'pprint': write_pprint, 'ndjson': write_ndjson, 'json': write_json, 'csv': write_csv}
+
+
+def write_result(result, output_format='pprint', stream=None):
+    WRITERS[output_format](result, stream or sys.stdout)
@@ -0,0 +1,115 @@
+"""
+Span recorder behind main.py --profile.
+
+Every request made through the session registry, every Karaf command and the bootstrap phases of a strategy
+(tool module loads and client builds) are recorded as spans. They are written as a Chrome trace
+(open in chrome://tracing or https://ui.perfetto.dev) and summarised per endpoint.
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# The profiler recording this process, if any
+current = None
+
+
+@contextmanager
+def phase(name, **args):
+    """Records a bootstrap phase on the current profiler, does nothing when not profiling"""
+    if current is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.record({
+            "name": name, "cat": "bootstrap", "start": start, "duration": time.perf_counter() - start, "args": args
+        })
+
+
+class Profiler:
+    def __init__(self):
+        self.spans = []
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._registry = None
+
+    def record(self, span):
+        span = dict(span, tid=threading.get_ident())
+        with self._lock:
+            self.spans.append(span)
+
+    def start(self):
+        global current
+        from .StrategyExecutor import load_tool_module
+
+        current = self
+        self._registry = load_tool_module("session_tool").registry
+        self._registry.observers.append(self.record)
+        return self
+
+    def stop(self):
+        global current
+        if self._registry and self.record in self._registry.observers:
+            self._registry.observers.remove(self.record)
+        current = None
+
+    @contextmanager
+    def strategy(self, name):
+        """Records the whole strategy run as the outermost span"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record({"name": name, "cat": "strategy", "start": start,
+                         "duration": time.perf_counter() - start, "args": {}})
+
+    def chrome_trace(self):
+        return {
+            "traceEvents": [
+                {
+                    "name": span["name"],
+                    "cat": span["cat"],
+                    "ph": "X",
+                    "ts": round((span["start"] - self.origin) * 1e6, 1),
+                    "dur": round(span["duration"] * 1e6, 1),
+                    "pid": 1,
+                    "tid": span["tid"],
+                    "args": span["args"],
+                }
+                for span in self.spans
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def write_chrome_trace(self, path):
+        with open(path, "w") as trace_file:
+            json.dump(self.chrome_trace(), trace_file, default=str)
+
+    def endpoints(self):
+        """Per endpoint totals of the http and karaf spans, slowest total time first"""
+        totals = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "max": 0.0, "bytes": 0, "retries": 0})
+        for span in self.spans:
+            if span["cat"] not in ("http", "karaf"):
+                continue
+            endpoint = totals[span["name"]]
+            endpoint["calls"] += 1
+            endpoint["seconds"] += span["duration"]
+            endpoint["max"] = max(endpoint["max"], span["duration"])
+            endpoint["bytes"] += span["args"].get("bytes") or 0
+            endpoint["retries"] += span["args"].get("retries") or 0
+        return sorted(totals.items(), key=lambda item: item[1]["seconds"], reverse=True)
+
+    def summary(self, top=10):
+        rows = [f"{'calls':>6} {'total s':>9} {'max s':>8} {'bytes':>11} {'retries':>7}  endpoint"]
+        for name, endpoint in self.endpoints()[:top]:
+            rows.append(
+                f"{endpoint['calls']:>6} {endpoint['seconds']:>9.3f} {endpoint['max']:>8.3f} "
+                f"{endpoint['bytes']:>11} {endpoint['retries']:>7}  {name}"
+            )
+        bootstrap = sum(span["duration"] for span in self.spans if span["cat"] == "bootstrap")
+        rows.append(f"bootstrap: {bootstrap:.3f}s over {sum(s['cat'] == 'bootstrap' for s in self.spans)} phases")
+        return "\n".join(rows)
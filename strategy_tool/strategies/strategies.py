@@ -1,22 +1,19 @@
+import asyncio
 import json
-import pathlib
-import webbrowser
+import sys
 from datetime import date
 from time import sleep
 
-import urllib3
-
-from .StrategyExecutor import Strategy
+from .StrategyExecutor import Executor, Strategy
 from signal import signal, SIGINT
 
 __all__ = [
     'Test', 'ViewHealthReport', 'AllJobsInView', 'CloneJob', 'BuildJob',
-    'JobInfo', 'JobHealthReport',
-    'LastBuildConsoleOutput', 'PullBuildArtifactsAndRobotReports', 'PullACCxDEVANYTESTBuildArtifacts'
+    'JobInfo', 'JobHealthReport', 'ViewBuildTrends',
+    'LastBuildConsoleOutput', 'PullBuildArtifactsAndRobotReports', 'PullACCxDEVANYTESTBuildArtifacts',
+    'IngestRobotResults', 'FlakyRobotTests', 'RobotKeywordProfile', 'DiffRobotBuilds'
  ]
 
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
 
 class Test(Strategy):
     """Get info for user executing the script, used as a convenience method for testing"""
@@ -29,22 +26,22 @@ class Test(Strategy):
 
 
 class ViewHealthReport(Strategy):
-    """Get view_name health report"""
+    """Get view_name health report, view_name may be several comma separated views, fetched concurrently"""
 
     def __init__(self, view_name):
         super().__init__()
         self.view_name = view_name
+        self.view_names = [name.strip() for name in view_name.split(',') if name.strip()]
 
-    def execute(self):
-        return [
-            self.jenkins_tool.server.jobs.health_report(job['name'])
-            for job in self.jenkins_tool.server.jobs.all_by_view_name(self.view_name)
-            if 'healthReport' in self.jenkins_tool.server.jobs.info_by_name(job['name'])
-        ]
+    async def execute(self):
+        views = self.jenkins_tool.server.views
+        reports = await asyncio.gather(*[self.run_blocking(views.health_report, name) for name in self.view_names])
+        return [job for report in reports for job in report]
 
 
 class AllJobsInView(Strategy):
     """Get all jobs in view_name"""
+    cache_ttl = 300
 
     def __init__(self, view_name):
         super().__init__()
@@ -67,18 +64,22 @@ class CloneJob(Strategy):
 
 
 class BuildJob(Strategy):
-    """Build job_name"""
+    """Build job_name, optional_wait=true waits for the build to finish and returns its result"""
 
-    def __init__(self, job_name):
+    def __init__(self, job_name, optional_wait=False):
         super().__init__()
         self.job_name = job_name
+        self.wait = json.loads(str(optional_wait).lower())
 
     def execute(self):
-        self.jenkins_tool.server.jobs.trigger_build_by_name(self.job_name)
+        queue_item = self.jenkins_tool.server.jobs.trigger_build_by_name(self.job_name)
+        if self.wait:
+            return self.jenkins_tool.server.builds.wait_for_build(self.job_name, queue_item)
 
 
 class JobInfo(Strategy):
     """Get job_name info"""
+    cache_ttl = 300
 
     def __init__(self, job_name):
         super().__init__()
@@ -99,15 +100,43 @@ class JobHealthReport(Strategy):
         return self.jenkins_tool.server.jobs.health_report(self.job_name)
 
 
+class ViewBuildTrends(Strategy):
+    """Pass rate, duration percentiles and trends over the last optional_builds builds of every job in view_name"""
+    cache_ttl = 300
+
+    def __init__(self, view_name, optional_builds=30):
+        super().__init__()
+        self.view_name = view_name
+        self.builds = int(optional_builds)
+
+    def execute(self):
+        jobs = self.jenkins_tool.server.jobs
+        names = [job['name'] for job in jobs.all_by_view_name(self.view_name)]
+        view_trends = []
+        for trends in jobs.build_trends(names, self.builds):
+            if trends['error']:
+                print(f"--(( {trends['name']}: {trends['error']}")
+            else:
+                view_trends.append({"Name": trends['name'], **trends['result']['stats']})
+        return view_trends
+
+
 class LastBuildConsoleOutput(Strategy):
-    """Get job_name console output"""
+    """Get job_name console output, optional_follow=true tails a running build until it finishes"""
 
-    def __init__(self, job_name):
+    def __init__(self, job_name, optional_follow=False):
         super().__init__()
         self.job_name = job_name
+        self.follow = json.loads(str(optional_follow).lower())
 
     def execute(self):
         last_build_number = self.jenkins_tool.server.jobs.last_build_number_by_name(self.job_name)
+        if self.follow:
+            for _, text in self.jenkins_tool.server.builds.console_chunks(self.job_name, last_build_number,
+                                                                            follow=True):
+                sys.stdout.write(text)
+                sys.stdout.flush()
+            return None
         return self.jenkins_tool.server.builds.console_output(self.job_name, last_build_number)
 
 
@@ -130,42 +159,119 @@ class PullBuildArtifactsAndRobotReports(Strategy):
         return self.jenkins_tool.server.builds.console_output(job_name, build_number)
 
     def execute(self):
+        import webbrowser
         us_console = self.pull_consoles(self.job_name, self.build_number)
-        accx_build_num = self.console_parser.find_accx_build(us_console)
+        accx_build_num = self.console_parser.find_build(us_console)
 
         self.jenkins_tool.server.builds.download_build_artifact(self.accx_job_name, accx_build_num, full_archive=True)
-        self.jenkins_tool.server.builds.robot.download_robot_log(self.job_name, self.build_number)
-        self.jenkins_tool.server.builds.robot.download_robot_report(self.job_name, self.build_number)
-        webbrowser.open_new(self.script_dir / self.output_dir / self.robot_log_name)
-        webbrowser.open_new_tab(self.script_dir / self.output_dir / self.robot_report_name)
+        log_path = self.jenkins_tool.server.builds.robot.download_robot_log(self.job_name, self.build_number)
+        report_path = self.jenkins_tool.server.builds.robot.download_robot_report(self.job_name, self.build_number)
+        webbrowser.open_new(str(log_path.absolute()))
+        webbrowser.open_new_tab(str(report_path.absolute()))
 
 
 class PullACCxDEVANYTESTBuildArtifacts(Strategy):
-    """Pull build artifacts and robot reports from any ACCx_DEV_ANYTEST build"""
+    """Pull build artifacts and robot reports from any ACCx_DEV_ANYTEST build,
+       optional_artifacts=glob fetches only the matching artifacts instead of the full archive"""
 
-    def __init__(self, build_number):
+    def __init__(self, build_number, optional_artifacts=None):
         super().__init__()
         self.job_name = "DEV_ACCx-ANYTEST"
         self.build_number = build_number
-        self.robot_log_name = f"log-{self.build_number}.html"
-        self.robot_report_name = f"report-{self.build_number}.html"
+        self.artifacts = optional_artifacts
 
     def execute(self):
-        self.jenkins_tool.server.builds.download_build_artifact(self.job_name, self.build_number, full_archive=True)
-        self.jenkins_tool.server.builds.download_robot_log(
-            self.job_name,
-            self.build_number,
-            custom_output_file=self.robot_log_name
-        )
-        self.jenkins_tool.server.builds.download_robot_report(
-            self.job_name,
-            self.build_number,
-            custom_output_file=self.robot_report_name
-        )
-        log_full_path = str(pathlib.Path(f"{self.output_dir.name}/{self.robot_log_name}").absolute())
-        report_full_path = str(pathlib.Path(f"{self.output_dir.name}/{self.robot_report_name}").absolute())
-        webbrowser.open_new(log_full_path)
-        webbrowser.open_new_tab(report_full_path)
+        import webbrowser
+        if self.artifacts:
+            for download in self.jenkins_tool.server.builds.download_artifacts(
+                    self.job_name, self.build_number, self.artifacts, output_dir=self.output_dir.name):
+                if download['error']:
+                    print(f"--(( {download['name']}: {download['error']}")
+        else:
+            self.jenkins_tool.server.builds.download_build_artifact(self.job_name, self.build_number,
+                                                                    full_archive=True)
+        log_path = self.jenkins_tool.server.builds.robot.download_robot_log(self.job_name, self.build_number)
+        report_path = self.jenkins_tool.server.builds.robot.download_robot_report(self.job_name, self.build_number)
+        webbrowser.open_new(str(log_path.absolute()))
+        webbrowser.open_new_tab(str(report_path.absolute()))
+
+
+class IngestRobotResults(Strategy):
+    """Index the Robot results of the last optional_builds builds of job_name, builds already indexed are skipped"""
+
+    def __init__(self, job_name, optional_builds=1):
+        super().__init__()
+        self.job_name = job_name
+        self.builds = int(optional_builds)
+
+    def execute(self):
+        return [{"Build": ingest['name'][1], **(ingest['result'] or {}), "Error": ingest['error']}
+                for ingest in self.jenkins_tool.server.builds.robot.ingest_recent(self.job_name, self.builds)]
+
+
+class FlakyRobotTests(Strategy):
+    """Rank flaky tests over the last optional_builds builds of the comma separated job_names,
+       builds not indexed yet are ingested first"""
+
+    def __init__(self, job_names, optional_builds=20, optional_top=25):
+        super().__init__()
+        self.job_names = [job_name.strip() for job_name in job_names.split(',') if job_name.strip()]
+        self.builds = int(optional_builds)
+        self.top = int(optional_top)
+
+    def execute(self):
+        robot = self.jenkins_tool.server.builds.robot
+        for job_name in self.job_names:
+            for ingest in robot.ingest_recent(job_name, self.builds):
+                if ingest['error']:
+                    print(f"--(( {job_name} #{ingest['name'][1]}: {ingest['error']}")
+        # Reuses the job info ingest_recent just fetched
+        last_builds = {job_name: self.jenkins_tool.server.jobs.last_build_number_by_name(job_name)
+                       for job_name in self.job_names}
+        return robot.index.flaky_tests(self.job_names, self.builds, self.top, last_builds)
+
+
+class RobotKeywordProfile(Strategy):
+    """Hot keywords, retry overhead and suite setup cost over the Robot outputs of the last optional_builds builds
+       of job_name"""
+
+    def __init__(self, job_name, optional_builds=1, optional_top=20):
+        super().__init__()
+        self.job_name = job_name
+        self.builds = int(optional_builds)
+        self.top = int(optional_top)
+
+    def execute(self):
+        robot = self.jenkins_tool.server.builds.robot
+        outputs = []
+        for download in robot.download_recent_outputs(self.job_name, self.builds):
+            if download['error']:
+                print(f"--(( {self.job_name} #{download['name'][1]}: {download['error']}")
+            else:
+                outputs.append(download['result'])
+        return robot.profile_keywords(outputs, self.top)
+
+
+class DiffRobotBuilds(Strategy):
+    """Robot result changes of job_name build_number since optional_base_build, by default the last green build"""
+
+    def __init__(self, job_name, build_number, optional_base_build=None):
+        super().__init__()
+        self.job_name = job_name
+        self.build_number = int(build_number)
+        self.base_build = int(optional_base_build) if optional_base_build else None
+
+    def last_green_build(self):
+        history = self.jenkins_tool.server.jobs.build_history(self.job_name, limit=100)
+        for number, result in zip(history['number'], history['result']):
+            if number < self.build_number and result == 'SUCCESS':
+                return number
+        raise Exception(f"No green build of {self.job_name} before #{self.build_number} in its last 100 builds")
+
+    def execute(self):
+        base_build = self.base_build or self.last_green_build()
+        print(f"--(( Comparing {self.job_name} #{self.build_number} with #{base_build} ))")
+        return self.jenkins_tool.server.builds.robot.diff_builds(self.job_name, base_build, self.build_number)
 
 
 class CreateJiraFromLastJobsExecution(Strategy):
@@ -176,7 +282,7 @@ class CreateJiraFromLastJobsExecution(Strategy):
         self.view_name = view_name
 
     def execute(self):
-        view_health = str(ViewHealthReport(self.view_name).execute())
+        view_health = str(Executor(self.sub_strategy(ViewHealthReport, self.view_name)).execute_strategy())
         created_jira = self.jira_tool.issue.create(
             {
                 "fields": {
@@ -211,8 +317,15 @@ class CreateJiraFromLastJobsExecution(Strategy):
         # print(created_jira)
         self.jira_tool.issue.comment.post(created_jira['key'], {'body': f"{json.dumps(view_health)}"})
 
-        for job_name in ['ACC3_RTA_DWH_NIGHTLY', 'ACC4_RTA_DWH_NIGHTLY', 'ACC5CDCS_RTA_DWH_NIGHTLY']:
-            last_build_number = self.jenkins_tool.server.jobs.last_build_number_by_name(job_name)
+        last_builds = self.jenkins_tool.server.jobs.map_jobs(
+            ['ACC3_RTA_DWH_NIGHTLY', 'ACC4_RTA_DWH_NIGHTLY', 'ACC5CDCS_RTA_DWH_NIGHTLY'],
+            'last_build_number_by_name',
+        )
+        for last_build in last_builds:
+            job_name, last_build_number = last_build['name'], last_build['result']
+            if last_build['error']:
+                print(f"Could not get last build of {job_name}: {last_build['error']}")
+                continue
 
             self.jira_tool.issue.comment.post(
                 created_jira['key'],
@@ -228,6 +341,7 @@ class CreateJiraFromLastJobsExecution(Strategy):
 
 class GetJiraIssue(Strategy):
     """Get Jira issue"""
+    cache_ttl = 120
 
     def __init__(self, issue_key):
         super().__init__()
@@ -279,6 +393,9 @@ class ElasticClusterState(Strategy):
         Possible values for metric:
             'nodes', 'routing_table', 'routing_nodes', 'metadata', 'master_node', 'blocks', 'version'
             '_all' is the default value
+        Yields one {section, key, value} record per index, node or top level value, in the order of the response,
+        so it can be streamed with --format ndjson. The default pprint output is therefore the list of these
+        records, not the nested state dict
     """
 
     def __init__(self, metric='_all'):
@@ -286,7 +403,7 @@ class ElasticClusterState(Strategy):
         self.metric = metric
 
     def execute(self):
-        return self.elastic_tool.cluster.state(metric=self.metric)
+        return self.elastic_tool.cluster.state_entries(metric=self.metric)
 
 
 class ElasticClusterHealth(Strategy):
@@ -301,6 +418,7 @@ class ElasticClusterHealth(Strategy):
 
 class ElasticClusterStats(Strategy):
     """ElasticSearch cluster stats"""
+    cache_ttl = 60
 
     def __init__(self):
         super().__init__()
@@ -321,6 +439,7 @@ class AllCurrentElasticTasks(Strategy):
 
 class ElasticIndexInfo(Strategy):
     """Get ElasticSearch index info"""
+    cache_ttl = 300
 
     def __init__(self, index_name):
         super().__init__()
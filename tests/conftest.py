@@ -0,0 +1,56 @@
+import importlib
+import sys
+from importlib.machinery import SourceFileLoader
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+# Rebot 5 output.xml of a real run, 24 tests in 4 suites, 5 of them failed
+ROBOT_OUTPUT = ROOT / "jenkins_tool" / "output" / "sean.txt"
+
+
+def load(name, path):
+    """Loads a module from its file, the way strategy_tool loads the tools"""
+    return SourceFileLoader(name, str(ROOT / path)).load_module()
+
+
+@pytest.fixture(scope="session")
+def jenkins_tool():
+    return load("jenkins_tool", "jenkins_tool/jenkins_tool.py")
+
+
+@pytest.fixture(scope="session")
+def session_tool():
+    return load("session_tool", "session_tool/session_tool.py")
+
+
+@pytest.fixture(scope="session")
+def output():
+    return load("strategy_output", "strategy_tool/strategies/output.py")
+
+
+@pytest.fixture(scope="session")
+def strategies():
+    """The strategies package modules, imported as a package because they use relative imports"""
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    return importlib.import_module("strategy_tool.strategies.strategies")
+
+
+@pytest.fixture
+def robot_xml(tmp_path):
+    """Writes a minimal Robot Framework 7 output.xml, tests given as {name: status}, and returns its path"""
+    def write(tests, name="output.xml", elapsed=None):
+        elapsed = elapsed or {}
+        body = "".join(
+            f'<test name="{test}"><status status="{status}" start="2024-01-01T00:00:00" '
+            f'elapsed="{elapsed.get(test, 1.0)}">{"boom " + test if status == "FAIL" else ""}</status></test>'
+            for test, status in tests.items()
+        )
+        path = tmp_path / name
+        path.write_text(f'<robot><suite name="Suite">{body}'
+                        f'<status status="PASS" start="2024-01-01T00:00:00" elapsed="1.0"/></suite></robot>')
+        return path
+
+    return write
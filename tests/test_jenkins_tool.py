@@ -0,0 +1,289 @@
+import fcntl
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import ROBOT_OUTPUT
+
+
+class FakeServer:
+    """Stands in for the python-jenkins server, map_jobs only needs its url"""
+
+    def __init__(self, url="http://jenkins.test/"):
+        self.server = url
+
+
+def test_merge_tree_fields_merges_subfields_per_key(jenkins_tool):
+    merged = jenkins_tool.merge_tree_fields(
+        ['lastBuild[number]', 'name', 'lastBuild[number,url]', 'actions[causes[a]]', 'actions[causes[b],x]'])
+
+    assert merged == ('lastBuild[number,url]', 'name', 'actions[causes[a,b],x]')
+    assert jenkins_tool.merge_tree_fields(['lastBuild', 'lastBuild[number]']) == ('lastBuild',)
+    assert jenkins_tool.merge_tree_fields(['allBuilds[number]{0,30}']) == ('allBuilds[number]{0,30}',)
+
+
+def test_map_jobs_keeps_the_order_of_names(jenkins_tool):
+    def operation(number):
+        time.sleep(0.01 * (5 - number))
+        return number * 2
+
+    results = jenkins_tool.map_jobs(FakeServer(), [1, 2, 3, 4], operation, max_workers=4)
+
+    assert [result['name'] for result in results] == [1, 2, 3, 4]
+    assert [result['result'] for result in results] == [2, 4, 6, 8]
+    assert all(result['error'] is None for result in results)
+
+
+def test_map_jobs_unpacks_tuples_and_reports_errors(jenkins_tool):
+    def operation(job_name, number):
+        if number == 2:
+            raise KeyError(job_name)
+        return f"{job_name}#{number}"
+
+    results = jenkins_tool.map_jobs(FakeServer(), [("job", 1), ("job", 2)], operation)
+
+    assert results[0] == {"name": ("job", 1), "result": "job#1", "error": None}
+    assert results[1]['result'] is None and results[1]['error'] == "KeyError: 'job'"
+
+
+def test_map_jobs_timeout_reports_and_cancels(jenkins_tool):
+    release = threading.Event()
+
+    def operation(number):
+        if number == 1:
+            return number
+        release.wait(5)
+        return number
+
+    try:
+        results = jenkins_tool.map_jobs(FakeServer(), [1, 2, 3], operation, max_workers=1, timeout=0.2)
+    finally:
+        release.set()
+
+    assert results[0]['result'] == 1
+    assert results[1]['error'].startswith("TimeoutError")
+    assert results[2]['error'].startswith("CancelledError")
+
+
+def test_map_jobs_runs_daemon_workers(jenkins_tool):
+    daemons = []
+    jenkins_tool.map_jobs(FakeServer(), [1], lambda number: daemons.append(threading.current_thread().daemon))
+
+    assert daemons == [True]
+
+
+def test_nested_map_jobs_does_not_exhaust_the_master_limit(jenkins_tool):
+    server = FakeServer("http://nested.test/")
+
+    def request():
+        with jenkins_tool.http_permit():
+            time.sleep(0.001)
+
+    def outer(number):
+        request()
+        return [result['result'] for result in jenkins_tool.map_jobs(server, [1, 2], lambda inner: request() or inner)]
+
+    names = list(range(jenkins_tool.MASTER_CONCURRENCY * 2))
+    results = jenkins_tool.map_jobs(server, names, outer, max_workers=len(names), timeout=10)
+
+    assert all(result['result'] == [1, 2] for result in results)
+
+
+def test_history_stats_skips_running_builds(jenkins_tool):
+    history = {"number": [4, 3, 2, 1], "result": [None, 'SUCCESS', 'FAILURE', 'SUCCESS'],
+               "duration": [0, 30, 20, 10], "timestamp": [0, 0, 0, 0]}
+
+    stats = jenkins_tool.history_stats(history)
+
+    assert stats == {"builds": 3, "pass_rate": 2 / 3, "duration_p50": 20, "duration_p90": 30, "duration_max": 30,
+                     "pass_rate_trend": -0.5, "duration_trend": 10.0}
+
+
+def test_history_stats_without_finished_builds(jenkins_tool):
+    stats = jenkins_tool.history_stats({"number": [1], "result": [None], "duration": [0], "timestamp": [0]})
+
+    assert stats['builds'] == 0
+    assert stats['pass_rate'] is None and stats['duration_trend'] is None
+
+
+def test_robot_records_streams_tests_and_suites(jenkins_tool):
+    records = list(jenkins_tool.robot_records(ROBOT_OUTPUT))
+    tests = [record for record in records if record['type'] == 'test']
+    top = [record for record in records if record['type'] == 'suite' and record['suite'] is None]
+
+    assert len(tests) == 24
+    assert sum(test['status'] == 'FAIL' for test in tests) == 5
+    assert [suite['longname'] for suite in top] == ['Portal Tests']
+    assert (top[0]['passed'], top[0]['failed'], top[0]['skipped']) == (19, 5, 0)
+    assert records[-1] is top[0]
+    assert tests[0]['longname'].startswith(tests[0]['suite'] + '.')
+    assert tests[0]['elapsed'] == pytest.approx(12.652)
+
+
+@pytest.fixture
+def index(jenkins_tool, tmp_path):
+    return jenkins_tool.JenkinsTool.Server.Builds.Robot.ResultIndex(tmp_path / "index.sqlite3")
+
+
+def test_ingest_replaces_the_build_rows(index):
+    first = index.ingest("job", 7, ROBOT_OUTPUT)
+    second = index.ingest("job", 7, ROBOT_OUTPUT)
+
+    assert first == second == {"suites": 4, "tests": 24, "keywords": 2202}
+    assert index.builds("job") == [7]
+    assert len(index.failures("job", 7)) == 5
+
+
+def index_runs(index, job_name, statuses):
+    """Indexes one test, T, with the status given per build number"""
+    connection = index.connect()
+    with connection:
+        for number, status in statuses.items():
+            connection.execute("INSERT INTO builds VALUES (?, ?, '', 0)", (job_name, number))
+            connection.execute("INSERT INTO tests VALUES (?, ?, 'T', 'T', 'S', ?, NULL, NULL, 1.0, '', '[]')",
+                               (job_name, number, status))
+    connection.close()
+
+
+def test_flaky_tests_scores_flips_over_the_build_window(index):
+    index_runs(index, "job", {1: 'FAIL', 2: 'PASS', 3: 'FAIL', 4: 'PASS', 5: 'PASS', 10: 'FAIL', 11: 'PASS'})
+
+    everything = index.flaky_tests(["job"], builds=20)
+    recent = index.flaky_tests(["job"], builds=3)
+
+    assert len(everything) == 1
+    assert (everything[0]['runs'], everything[0]['failures'], everything[0]['flips']) == (7, 3, 5)
+    assert everything[0]['last_failure'] == 10
+    # Builds 9 to 11, only 10 and 11 were indexed
+    assert (recent[0]['runs'], recent[0]['flip_rate'], recent[0]['score']) == (2, 1.0, 1.0)
+
+
+def test_flaky_tests_window_ends_at_the_last_jenkins_build(index):
+    index_runs(index, "job", {1: 'FAIL', 2: 'PASS', 3: 'FAIL'})
+
+    assert index.flaky_tests(["job"], builds=3, last_builds={"job": 3})
+    assert index.flaky_tests(["job"], builds=3, last_builds={"job": 10}) == []
+    assert index.flaky_tests(["other"], builds=3) == []
+
+
+def test_flaky_tests_ranks_broken_tests_below_flaky_ones(index):
+    index_runs(index, "flaky", {1: 'PASS', 2: 'FAIL', 3: 'PASS', 4: 'FAIL'})
+    index_runs(index, "broken", {1: 'PASS', 2: 'PASS', 3: 'FAIL', 4: 'FAIL'})
+
+    ranked = index.flaky_tests(["flaky", "broken"])
+
+    assert [row['job'] for row in ranked] == ["flaky", "broken"]
+    assert ranked[1]['clustering'] == 0.5
+
+
+def test_robot_records_keywords_normalise_kw_type(jenkins_tool):
+    kw_types = {record['kw_type'] for record in jenkins_tool.robot_records(ROBOT_OUTPUT, keywords=True)
+                if record['type'] == 'keyword'}
+
+    assert kw_types == {'KEYWORD', 'SETUP', 'TEARDOWN', 'FOR', 'ITERATION'}
+
+
+def test_profile_keywords_leaves_out_control_structures(jenkins_tool):
+    profile = jenkins_tool.JenkinsTool.Server.Builds.Robot.profile_keywords([ROBOT_OUTPUT], top=1000)
+    profiled = {(stats['name'], stats['library']) for stats in profile['keywords']}
+    loops = {(record['name'], record['library']) for record in jenkins_tool.robot_records(ROBOT_OUTPUT, keywords=True)
+             if record['type'] == 'keyword' and record['kw_type'] in ('FOR', 'ITERATION')}
+
+    assert loops and not profiled & loops
+    assert profile['suite_setup'][0]['setup'] > 0
+
+
+def test_diff_classifies_status_changes(jenkins_tool, robot_xml):
+    base = robot_xml({"a": 'PASS', "b": 'FAIL', "c": 'FAIL', "d": 'PASS', "e": 'SKIP', "f": 'FAIL', "g": 'PASS',
+                      "gone": 'PASS'}, name="base.xml", elapsed={"g": 2.0})
+    new = robot_xml({"a": 'FAIL', "b": 'PASS', "c": 'FAIL', "d": 'SKIP', "e": 'PASS', "f": 'SKIP', "g": 'PASS',
+                     "new": 'PASS'}, name="new.xml", elapsed={"g": 10.0})
+
+    diff = jenkins_tool.JenkinsTool.Server.Builds.Robot.diff(base, new)
+
+    assert diff['new_failures'] == [{"longname": "Suite.a", "message": "boom a"}]
+    assert diff['fixed'] == ["Suite.b"]
+    assert diff['changed_messages'] == []
+    assert [(skip['longname'], skip['base_status']) for skip in diff['new_skips']] == [
+        ("Suite.d", 'PASS'), ("Suite.f", 'FAIL')]
+    assert [(test['longname'], test['status']) for test in diff['unskipped']] == [("Suite.e", 'PASS')]
+    assert diff['added'] == [{"longname": "Suite.new", "status": 'PASS'}]
+    assert diff['removed'] == [{"longname": "Suite.gone", "status": 'PASS'}]
+    assert diff['slower'] == [{"longname": "Suite.g", "base_elapsed": 2.0, "elapsed": 10.0}]
+
+
+def test_diff_of_identical_outputs_is_empty(jenkins_tool):
+    diff = jenkins_tool.JenkinsTool.Server.Builds.Robot.diff(ROBOT_OUTPUT, ROBOT_OUTPUT)
+
+    assert not any(diff.values())
+
+
+def test_jenkins_auth_stays_off_the_shared_session(jenkins_tool, session_tool, monkeypatch):
+    monkeypatch.setenv('jenkins_script_user', 'user')
+    monkeypatch.setenv('jenkins_script_token', 'token')
+    monkeypatch.setenv('jenkins_url', 'http://jenkins.test/')
+    registry = session_tool.SessionRegistry()
+    server = jenkins_tool.JenkinsTool(registry).server.server
+
+    server._maybe_add_auth()
+    prepared = server._session.prepare_request(jenkins_tool.requests.Request('GET', 'http://jenkins.test/api/json'))
+
+    assert 'Authorization' in prepared.headers
+    assert registry.session('http://jenkins.test/').auth is None
+
+
+def test_console_cache_evict_removes_unheld_lock_files(jenkins_tool, tmp_path):
+    cache = jenkins_tool.JenkinsTool.Server.Builds.ConsoleCache(None, directory=tmp_path)
+    master = tmp_path / "master"
+    master.mkdir()
+    for name in ("finished", "held", "updating"):
+        (master / f"{name}-1.lock").touch()
+    (master / "finished-1.log.gz").touch()
+    (master / "updating-1.part").touch()
+
+    with open(master / "held-1.lock") as held:
+        fcntl.flock(held, fcntl.LOCK_EX)
+        cache.evict()
+
+    assert sorted(path.name for path in master.glob('*.lock')) == ["held-1.lock", "updating-1.lock"]
+
+
+def test_console_cache_lock_survives_eviction_of_its_file(jenkins_tool, tmp_path):
+    cache = jenkins_tool.JenkinsTool.Server.Builds.ConsoleCache(None, directory=tmp_path)
+    (tmp_path / "master").mkdir()
+    lock_path = tmp_path / "master" / "job-1.lock"
+
+    with cache._locked(lock_path):
+        cache.evict()
+        assert lock_path.exists()
+    cache.evict()
+
+    assert not lock_path.exists()
+
+
+def test_diff_builds_indexes_the_base_while_the_other_output_downloads(jenkins_tool, robot_xml):
+    outputs = {1: robot_xml({"a": 'PASS', "b": 'FAIL'}, name="base.xml"),
+               2: robot_xml({"a": 'FAIL', "b": 'PASS'}, name="new.xml")}
+    base_indexed = threading.Event()
+    Robot = jenkins_tool.JenkinsTool.Server.Builds.Robot
+    robot = Robot.__new__(Robot)
+    robot.server = SimpleNamespace(
+        map_jobs=lambda names, operation: jenkins_tool.map_jobs(FakeServer(), names, operation, max_workers=2))
+
+    def download_robot_file(job_name, number, output_file):
+        if number == 2:
+            # The other download only completes once the base output has been indexed
+            assert base_indexed.wait(5)
+        return outputs[number]
+
+    def test_results(file_name):
+        results = Robot._test_results(file_name)
+        base_indexed.set()
+        return results
+
+    robot.download_robot_file = download_robot_file
+    robot._test_results = test_results
+
+    assert robot.diff_builds("job", 1, 2) == Robot.diff(outputs[1], outputs[2])
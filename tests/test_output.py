@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+
+import pytest
+
+
+def rows():
+    yield {"name": "a", "count": 1}
+    yield {"name": "b", "count": 2}
+
+
+def test_write_json_streams_an_iterator_as_an_array(output):
+    stream = io.StringIO()
+
+    output.write_json(rows(), stream)
+
+    assert json.loads(stream.getvalue()) == [{"name": "a", "count": 1}, {"name": "b", "count": 2}]
+
+
+def test_write_json_writes_other_results_as_one_document(output):
+    stream = io.StringIO()
+
+    output.write_json({"total": 3}, stream)
+
+    assert json.loads(stream.getvalue()) == {"total": 3}
+
+
+def test_write_json_of_an_empty_iterator(output):
+    stream = io.StringIO()
+
+    output.write_json(iter(()), stream)
+
+    assert json.loads(stream.getvalue()) == []
+
+
+def test_write_ndjson_writes_one_item_per_line(output):
+    stream = io.StringIO()
+
+    output.write_ndjson(rows(), stream)
+
+    assert [json.loads(line) for line in stream.getvalue().splitlines()] == list(rows())
+
+
+def test_write_csv_takes_the_columns_of_every_list_row(output):
+    stream = io.StringIO()
+
+    output.write_csv([{"name": "a"}, {"name": "b", "tags": ["x"]}], stream)
+
+    assert list(csv.DictReader(io.StringIO(stream.getvalue()))) == [
+        {"name": "a", "tags": ""}, {"name": "b", "tags": '["x"]'}]
+
+
+def test_write_csv_streams_an_iterator(output):
+    stream = io.StringIO()
+
+    output.write_csv(rows(), stream)
+
+    assert list(csv.DictReader(io.StringIO(stream.getvalue()))) == [
+        {"name": "a", "count": "1"}, {"name": "b", "count": "2"}]
+
+
+def test_write_csv_rejects_a_new_column_in_an_iterator(output):
+    def changing():
+        yield {"name": "a"}
+        yield {"name": "b", "extra": 1}
+
+    with pytest.raises(ValueError, match="extra"):
+        output.write_csv(changing(), io.StringIO())
+
+
+def test_write_csv_wraps_scalars(output):
+    stream = io.StringIO()
+
+    output.write_csv([1, 2], stream)
+
+    assert stream.getvalue().splitlines() == ["value", "1", "2"]
+
+
+def test_materialize_only_turns_iterators_into_lists(output):
+    assert output.materialize(rows()) == list(rows())
+    result = {"a": 1}
+    assert output.materialize(result) is result
@@ -0,0 +1,32 @@
+import pytest
+
+
+@pytest.mark.parametrize("url, template", [
+    ("http://jenkins/job/my_job/42/api/json?depth=1", "/job/{name}/{n}/api/json?depth={}"),
+    ("http://jenkins/job/team/job/my_job/lastBuild/api/json", "/job/{name}/job/{name}/lastBuild/api/json"),
+    ("https://jira/rest/api/2/issue/PROJ-1", "/rest/api/{n}/issue/{name}"),
+    ("http://es:9200/_cluster/health", "/_cluster/health"),
+    ("http://jenkins/job/my_job/", "/job/{name}/"),
+])
+def test_url_template(session_tool, url, template):
+    assert session_tool.url_template(url) == template
+
+
+def test_registry_shares_one_session_per_host(session_tool):
+    registry = session_tool.SessionRegistry()
+    try:
+        first = registry.session("https://jenkins.test/jenkins/job/a")
+        assert registry.session("https://jenkins.test/other") is first
+        assert registry.session("https://jira.test/") is not first
+        assert registry.hosts() == ["https://jenkins.test", "https://jira.test"]
+    finally:
+        registry.close()
+
+
+def test_registry_turns_verification_off_per_host(session_tool):
+    registry = session_tool.SessionRegistry(insecure_hosts={"https://jira.test/"})
+    try:
+        assert registry.session("https://jira.test/rest/api/2").verify is False
+        assert registry.session("https://jenkins.test/").verify is True
+    finally:
+        registry.close()
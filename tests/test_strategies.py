@@ -0,0 +1,53 @@
+import asyncio
+import importlib
+import threading
+import time
+from types import SimpleNamespace
+
+
+class SlowViews:
+    """Stands in for the jenkins_tool views, each health report blocks for its view's latency"""
+
+    def __init__(self, latencies):
+        self.latencies = latencies
+
+    def health_report(self, view_name):
+        time.sleep(self.latencies[view_name])
+        return [{"Name": f"{view_name}-job", "Score": 100}]
+
+
+def with_jenkins(strategy, views):
+    strategy.tools._built['jenkins_tool'] = SimpleNamespace(server=SimpleNamespace(views=views))
+    return strategy
+
+
+def test_view_health_report_wall_time_tracks_the_slowest_view(strategies):
+    latencies = {"a": 0.3, "b": 0.1, "c": 0.2, "d": 0.2}
+    strategy = with_jenkins(strategies.ViewHealthReport("a, b,c,d"), SlowViews(latencies))
+
+    started = time.perf_counter()
+    report = strategies.Executor(strategy).execute_strategy()
+    elapsed = time.perf_counter() - started
+
+    assert [job['Name'] for job in report] == ["a-job", "b-job", "c-job", "d-job"]
+    assert max(latencies.values()) <= elapsed < sum(latencies.values()) / 2
+
+
+def test_view_health_report_of_a_single_view(strategies):
+    strategy = with_jenkins(strategies.ViewHealthReport("a"), SlowViews({"a": 0}))
+
+    assert strategies.Executor(strategy).execute_strategy() == [{"Name": "a-job", "Score": 100}]
+
+
+def test_async_executor_runs_sync_strategies_in_the_blocking_pool(strategies):
+    executor = importlib.import_module("strategy_tool.strategies.StrategyExecutor")
+
+    class CurrentThread(strategies.Strategy):
+        def execute(self):
+            return threading.current_thread().name
+
+    async def run():
+        return await executor.AsyncExecutor(CurrentThread()).execute_strategy()
+
+    assert asyncio.run(run()).startswith("blocking")
+    assert executor.Executor(CurrentThread()).execute_strategy() == threading.current_thread().name